@@ -0,0 +1,71 @@
+"""
+Budget de démarrage à froid du lanceur : temps d'import de main.py.
+
+    python bench_import.py [--budget-ms 250] [--runs 5] [--top 10]
+
+Importe main dans des processus neufs (python -X importtime), garde le meilleur des essais et
+affiche les imports les plus coûteux. Vérifie aussi que les sous-systèmes chargés à la demande
+(LAZY_MODULES) ne sont pas importés par main.py lui-même. Code de sortie 1 si le budget est
+dépassé ou si l'un d'eux est importé : à lancer avant de publier une nouvelle version du lanceur,
+depuis le dossier de dqxclarity.
+"""
+from pathlib import Path
+
+import argparse
+import subprocess
+import sys
+
+LAZY_MODULES = ["hooking", "scans", "dqxcrypt", "tkinter"]
+PROBE = "import sys, main; print(' '.join(sys.modules))"
+
+
+def measure(cwd: Path) -> tuple:
+    """(temps cumulé de l'import de main en µs, [(cumulé µs, import direct)], modules chargés) dans un processus neuf."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=cwd, capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(f"L'import de main a échoué :\n{result.stderr[-2000:]}")
+    # -X importtime écrit chaque module après ceux qu'il importe, indenté de deux espaces par niveau :
+    # les lignes de niveau 1 qui précèdent la ligne "main" sont ses imports directs.
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.rstrip()[1:]
+        if not name.startswith(" "):
+            if name == "main":
+                return int(cumulative), children, set(result.stdout.split())
+            children = []
+        elif not name.startswith("   "):
+            children.append((int(cumulative), name.strip()))
+    sys.exit("main absent de la sortie de -X importtime.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie le temps d'import de main.py (démarrage à froid du lanceur).")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="temps d'import maximal de main (défaut : 250 ms)")
+    parser.add_argument("--runs", type=int, default=5, help="nombre d'essais, le meilleur est retenu")
+    parser.add_argument("--top", type=int, default=10, help="nombre d'imports coûteux affichés")
+    parser.add_argument("--clarity-dir", type=Path, default=Path(__file__).parent)
+    args = parser.parse_args()
+
+    best = min((measure(args.clarity_dir) for _ in range(args.runs)), key=lambda r: r[0])
+    total, timings, modules = best
+    print(f"Import de main : {total / 1000:.1f} ms (meilleur de {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print("Imports directs de main les plus coûteux (cumulé) :")
+    for us, name in sorted(timings, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    eager = sorted(m for m in modules if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES))
+    failed = False
+    if eager:
+        print(f"Modules qui devraient être chargés à la demande : {', '.join(eager)}")
+        failed = True
+    if total / 1000 > args.budget_ms:
+        print(f"Budget dépassé de {total / 1000 - args.budget_ms:.1f} ms.")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark mémoire et débit du lecteur en flux (json_stream) sur les plus gros fichiers de Json/.
+
+    python bench_json_stream.py [--files 5] [--scale 1 4 16] [--batch 5000] [--runs 3]
+
+Pour chaque fichier, compare deux façons de remplir une table d'import SQLite (comme _fr_import) :
+
+- document : json.load, puis un dict {ja: fr} (ancien _charger_items_sst), puis executemany ;
+- flux : iter_records + batches, executemany par lots de --batch (mettre_a_jour_db_fr, corpus.iter_entries).
+
+--scale N mesure aussi une copie du fichier répétée N fois (ids renumérotés, écrite dans un dossier
+temporaire) : la mémoire du lecteur en flux doit rester la même quelle que soit la taille. Deux pics
+sont relevés :
+
+- py : allocations Python (tracemalloc) ;
+- RSS : croissance du pic de mémoire du processus (VmHWM, ru_maxrss ou psutil sous Windows), mesurée dans
+  un processus neuf par chargement ; elle compte aussi la mémoire de SQLite (table d'import, cache).
+
+La table d'import est, comme dans _ingerer_sst, une table TEMP avec temp_store=FILE. Le débit est
+mesuré sans tracemalloc, meilleur de --runs essais.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import multiprocessing
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from corpus import CORPUS_DIR, corpus_files
+from json_stream import batches, iter_records
+
+IMPORT_SQL = """
+    INSERT INTO temp."_fr_import" (ja, en) VALUES (?, ?)
+    ON CONFLICT(ja) DO UPDATE SET en = excluded.en;
+"""
+
+
+def _import_table() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("PRAGMA temp_store=FILE;")
+    conn.execute('CREATE TEMP TABLE "_fr_import" (ja TEXT PRIMARY KEY, en TEXT) WITHOUT ROWID;')
+    return conn
+
+
+def load_document(path: Path, batch: int) -> int:
+    with open(path, encoding="utf-8-sig") as f:
+        data = json.load(f)
+    items = {}
+    for value in data.values():
+        ((ja, fr),) = value.items()
+        items[ja] = "" if fr is None else fr
+    conn = _import_table()
+    conn.executemany(IMPORT_SQL, items.items())
+    conn.close()
+    return len(data)
+
+
+def load_stream(path: Path, batch: int) -> int:
+    conn = _import_table()
+    count = 0
+    for lot in batches(((ja, fr) for _, ja, fr in iter_records(path)), batch):
+        conn.executemany(IMPORT_SQL, lot)
+        count += len(lot)
+    conn.close()
+    return count
+
+
+def scaled_copy(path: Path, factor: int, directory: Path) -> Path:
+    """Copie de path répétée factor fois, écrite en flux (ids renumérotés, japonais rendu unique)."""
+    target = directory / f"{path.stem}.x{factor}.json"
+    with open(target, "w", encoding="utf-8") as f:
+        f.write("{")
+        n = 0
+        for copy in range(factor):
+            for _, ja, fr in iter_records(path):
+                ja = ja if copy == 0 else f"{ja}#{copy}"
+                f.write(f'{"," if n else ""}\n    {json.dumps(str(n))}: {{\n        {json.dumps(ja, ensure_ascii=False)}: {json.dumps(fr, ensure_ascii=False)}\n    }}')
+                n += 1
+        f.write("\n}")
+    return target
+
+
+def _max_rss():
+    """
+    Pic de mémoire du processus en octets, ou None si rien ne permet de le lire. Sous Linux, VmHWM
+    plutôt que ru_maxrss : ru_maxrss garde le pic du processus parent à travers fork et exec.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _rss_growth(loader_name: str, path: str, batch: int):
+    """Exécuté dans un processus neuf : croissance du pic RSS pendant un chargement."""
+    before = _max_rss()
+    globals()[loader_name](Path(path), batch)
+    after = _max_rss()
+    return None if before is None else after - before
+
+
+def measure_rss(loader, path: Path, batch: int):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_rss_growth, loader.__name__, str(path), batch).result()
+
+
+def measure(loader, path: Path, batch: int, runs: int) -> tuple:
+    """(entrées, meilleur temps en s, pic des allocations Python en octets)."""
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        count = loader(path, batch)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    loader(path, batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire et débit du lecteur JSON en flux sur les plus gros fichiers du corpus.")
+    parser.add_argument("--json-dir", type=Path, default=CORPUS_DIR)
+    parser.add_argument("--files", type=int, default=5, help="nombre de fichiers, les plus gros d'abord")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 4, 16], help="facteurs de répétition mesurés")
+    parser.add_argument("--batch", type=int, default=5000, help="taille des lots executemany")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    largest = sorted(corpus_files(args.json_dir), key=lambda p: p.stat().st_size, reverse=True)[:args.files]
+    print(f"{'fichier':<40} {'Mo':>6} {'entrées':>8}  {'document':>38}  {'flux':>38}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in largest:
+            for factor in args.scale:
+                source = path if factor == 1 else scaled_copy(path, factor, Path(tmp))
+                size = source.stat().st_size / 1e6
+                cells = []
+                for loader in (load_document, load_stream):
+                    count, elapsed, peak = measure(loader, source, args.batch, args.runs)
+                    rss = measure_rss(loader, source, args.batch)
+                    rss = "    ?" if rss is None else f"{rss / 1e6:6.1f}"
+                    cells.append(f"{size / elapsed:6.1f} Mo/s py {peak / 1e6:6.2f} Mo RSS {rss} Mo")
+                label = path.name if factor == 1 else f"  ×{factor}"
+                print(f"{label:<40} {size:6.1f} {count:8d}  {cells[0]:>38}  {cells[1]:>38}")
+                if source != path:
+                    source.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de la mise à jour UPDATE-only de m00_strings (mettre_a_jour_db_fr).
+
+    python bench_m00_strings.py [--rows 250000] [--entries 60000] [--baseline-sample 300]
+
+Compare, sur une base SQLite synthétique en mémoire, l'ancienne boucle (un UPDATE par
+entrée JSON, sans index sur ja) à _maj_en_par_ja (table temporaire + UPDATE ... FROM).
+L'ancienne boucle étant en O(N·M), elle n'est mesurée que sur un échantillon puis
+extrapolée au nombre total d'entrées. À lancer depuis le dossier de dqxclarity.
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from main import _maj_en_par_ja
+
+
+def make_db(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "m00_strings" (id INTEGER PRIMARY KEY AUTOINCREMENT, ja TEXT, en TEXT, file TEXT);')
+    conn.executemany(
+        'INSERT INTO "m00_strings" (ja, en, file) VALUES (?, ?, ?);',
+        ((f"テキスト{i:07d}の説明", f"Text {i}", f"items_{i % 40}") for i in range(rows)),
+    )
+    conn.commit()
+    return conn
+
+
+def make_entries(rows: int, entries: int, seed: int = 0) -> list:
+    """90 % d'entrées présentes dans la table, 10 % absentes (comptées comme non trouvées)."""
+    rng = random.Random(seed)
+    hits = rng.sample(range(rows), int(entries * 0.9))
+    result = [(f"テキスト{i:07d}の説明", f"Texte {i}") for i in hits]
+    result += [(f"存在しない{i}", f"Absent {i}") for i in range(entries - len(result))]
+    rng.shuffle(result)
+    return result
+
+
+def baseline(conn, rows):
+    """Ancienne implémentation : un UPDATE par entrée du dict {ja: fr} (doublons fusionnés, le dernier l'emporte)."""
+    cur = conn.cursor()
+    updated = skipped = 0
+    for ja, fr in dict(rows).items():
+        cur.execute('UPDATE "m00_strings" SET en = ? WHERE ja = ?;', (fr, ja))
+        if cur.rowcount == 0:
+            skipped += 1
+        else:
+            updated += 1
+    return updated, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la mise à jour en masse de m00_strings.")
+    parser.add_argument("--rows", type=int, default=250_000, help="lignes dans m00_strings")
+    parser.add_argument("--entries", type=int, default=60_000, help="entrées dans m00_strings.json")
+    parser.add_argument("--baseline-sample", type=int, default=300, help="entrées mesurées pour l'ancienne boucle")
+    args = parser.parse_args()
+
+    entries = make_entries(args.rows, args.entries)
+
+    conn = make_db(args.rows)
+    sample = entries[: args.baseline_sample]
+    t0 = time.perf_counter()
+    baseline(conn, sample)
+    per_entry = (time.perf_counter() - t0) / len(sample)
+    conn.rollback()
+    conn.close()
+    estimated = per_entry * len(entries)
+    print(f"boucle ligne à ligne : {per_entry * 1000:.2f} ms/entrée, ~{estimated:.1f} s estimées pour {len(entries)} entrées")
+
+    conn = make_db(args.rows)
+    t0 = time.perf_counter()
+    updated, skipped = _maj_en_par_ja(conn, "m00_strings", entries)
+    conn.commit()
+    bulk = time.perf_counter() - t0
+    print(f"mise à jour ensembliste : {bulk:.3f} s ({updated} MAJ, {skipped} non trouvées), index compris")
+    print(f"accélération : x{estimated / bulk:.0f}")
+
+    # Échantillon avec doublons (présents et absents) : ils ne comptent qu'une fois, comme dans l'ancien dict.
+    sample = entries[:200] + entries[:20]
+    check = make_db(args.rows)
+    expected = baseline(check, sample)
+    check.rollback()
+    assert expected == _maj_en_par_ja(check, "m00_strings", sample), "compteurs différents de la boucle"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Installation incrémentale d'une release de dqxclarity, partagée par main.py (mise à jour au lancement)
+et updater.py (mise à jour autonome) : les deux lisent et écrivent les mêmes fichiers sur disque.
+
+- misc_files/clarity_manifest.json : {chemin relatif: {size, crc, mtime_ns}} des fichiers installés ;
+- UPDATE_STAGING : extraction des fichiers modifiés avant la bascule ;
+- UPDATE_BACKUP/journal.json : originaux remplacés ou retirés, pour annuler une mise à jour
+  interrompue (annuler_maj, appelé au lancement suivant).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from zipfile import ZipFile
+
+import json
+import os
+import shutil
+import zlib
+
+CHUNK_SIZE = 1 << 20
+CLARITY_MANIFEST = Path('misc_files') / 'clarity_manifest.json'
+UPDATE_STAGING = '.update_staging'
+UPDATE_BACKUP = '.update_backup'
+UPDATE_JOURNAL = 'journal.json'
+RELEASE_PREFIX = 'dqxclarity/'
+
+
+def crc32_fichier(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def lire_manifeste(root):
+    """{chemin relatif: {size, crc, mtime_ns}} des fichiers installés par la dernière mise à jour."""
+    try:
+        data = json.loads((root / CLARITY_MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return data.get('files', {}) if data.get('version') == 1 else {}
+
+
+def ecrire_manifeste(root, members):
+    files = {}
+    for name, info in members.items():
+        st = (root / name).stat()
+        files[name] = {'size': info.file_size, 'crc': info.CRC, 'mtime_ns': st.st_mtime_ns}
+    path = root / CLARITY_MANIFEST
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.part')
+    tmp.write_text(json.dumps({'version': 1, 'files': files}), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def membres_release(zf, root, ignored_files, ignored_directories, warn):
+    """{chemin relatif: ZipInfo} des fichiers de la release à installer (préfixe dqxclarity/ retiré)."""
+    members = {}
+    for info in zf.infolist():
+        name = info.filename.replace('\\', '/')
+        if name.startswith(RELEASE_PREFIX):
+            name = name[len(RELEASE_PREFIX):]
+        if not name or info.is_dir():
+            continue
+        parts = Path(name).parts
+        if any(seg in ignored_directories for seg in parts) or parts[-1] in ignored_files:
+            continue
+        target = (root / name).resolve()
+        if root not in target.parents:
+            warn(f"Skipped unsafe path outside root: {target}")
+            continue
+        members[Path(name).as_posix()] = info
+    return members
+
+
+def fichier_inchange(path, info, known):
+    """
+    True si path a déjà le contenu du membre info. La taille et la date du manifeste local
+    évitent de relire le fichier ; sinon on compare son CRC32 à celui du zip.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    if not path.is_file() or st.st_size != info.file_size:
+        return False
+    if known and (known.get('size'), known.get('crc'), known.get('mtime_ns')) == (st.st_size, info.CRC, st.st_mtime_ns):
+        return True
+    return crc32_fichier(path) == info.CRC
+
+
+def annuler_maj(root):
+    """
+    Restaure l'installation d'après le journal d'une mise à jour interrompue ou en échec.
+    Renvoie True si une mise à jour a été annulée.
+    """
+    backup = root / UPDATE_BACKUP
+    journal = backup / UPDATE_JOURNAL
+    if not journal.exists():
+        shutil.rmtree(backup, ignore_errors=True)
+        return False
+    for name, existed in reversed(json.loads(journal.read_text(encoding='utf-8'))):
+        target, saved = root / name, backup / name
+        if existed:
+            if saved.exists():
+                os.replace(saved, target)
+        elif target.exists():
+            target.unlink()
+    shutil.rmtree(backup, ignore_errors=True)
+    return True
+
+
+def installer_release(root, zip_path, ignored_files, ignored_directories, warn):
+    """
+    Installe la release en ne remplaçant que les fichiers modifiés :
+    - comparaison de chaque membre au fichier installé (manifeste local, sinon CRC32), en parallèle ;
+    - extraction des fichiers modifiés dans UPDATE_STAGING, en parallèle ;
+    - bascule par os.replace, les originaux étant déplacés dans UPDATE_BACKUP avec un journal.
+    Les fichiers du manifeste précédent absents de la release sont retirés. En cas d'échec (ou si
+    le processus est interrompu, au lancement suivant), annuler_maj remet l'installation en l'état.
+    Renvoie (fichiers remplacés, fichiers retirés, nombre de fichiers inchangés).
+    """
+    staged = root / UPDATE_STAGING / 'files'
+    backup = root / UPDATE_BACKUP
+    old = lire_manifeste(root)
+    with ZipFile(zip_path) as zf:
+        members = membres_release(zf, root, ignored_files, ignored_directories, warn)
+
+        def _extraire(name):
+            dest = staged / name
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with zf.open(members[name]) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+        with ThreadPoolExecutor() as pool:
+            same = list(pool.map(lambda name: fichier_inchange(root / name, members[name], old.get(name)), members))
+            changed = [name for name, ok in zip(members, same) if not ok]
+            list(pool.map(_extraire, changed))
+
+    removed = [name for name in old if name not in members and (root / name).is_file()]
+    journal = [(name, (root / name).exists()) for name in changed] + [(name, True) for name in removed]
+    if journal:
+        backup.mkdir(parents=True, exist_ok=True)
+        tmp = backup / (UPDATE_JOURNAL + '.part')
+        tmp.write_text(json.dumps(journal), encoding='utf-8')
+        os.replace(tmp, backup / UPDATE_JOURNAL)
+        try:
+            for name, existed in journal:
+                target = root / name
+                if existed:
+                    (backup / name).parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(target, backup / name)
+                if name in members:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(staged / name, target)
+        except Exception:
+            annuler_maj(root)
+            raise
+    ecrire_manifeste(root, members)
+    (backup / UPDATE_JOURNAL).unlink(missing_ok=True)
+    shutil.rmtree(backup, ignore_errors=True)
+    return changed, removed, len(members) - len(changed)
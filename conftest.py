@@ -0,0 +1 @@
+"""Les tests importent les modules du dépôt (corpus, string_store, ...) depuis la racine."""
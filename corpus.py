@@ -0,0 +1,102 @@
+"""
+Accès au corpus Json/ partagé par les outils de développement (string_store.py, ...).
+
+Chaque fichier a la forme {id: {ja: fr}} : une entrée par id, une seule clé japonaise,
+la traduction française en valeur ("" tant qu'elle n'est pas faite).
+"""
+from json.decoder import scanstring
+from pathlib import Path
+
+import hashlib
+import json
+import re
+
+from json_stream import BY_ID, iter_records
+
+CORPUS_DIR = Path(__file__).parent / "Json"
+_WS = re.compile(r"[ \t\n\r]*")
+
+
+def corpus_files(root: Path = CORPUS_DIR) -> list:
+    """Fichiers JSON du corpus, triés par nom."""
+    return sorted(Path(root).glob("*.json"))
+
+
+def iter_entries(path: Path):
+    """
+    Entrées (id, ja, fr) du fichier, dans l'ordre du fichier, lues en flux (json_stream) sans
+    construire le document : la mémoire ne dépend pas de la taille du fichier. Lève ValueError
+    (pendant l'itération) si la forme est invalide.
+    """
+    try:
+        yield from iter_records(path, layouts=(BY_ID,))
+    except ValueError as e:
+        raise ValueError(f"{Path(path).name}: {e}") from None
+
+
+def load_entries(path: Path) -> list:
+    """Liste des entrées (id, ja, fr) du fichier, pour les appelants qui les parcourent plusieurs fois."""
+    return list(iter_entries(path))
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    pos = _WS.match(text, pos).end()
+    if text[pos:pos + 1] != char:
+        raise ValueError(f"'{char}' attendu à la position {pos}")
+    return pos + 1
+
+
+def translation_spans(text: str) -> dict:
+    """
+    Position des traductions dans le texte d'un fichier du corpus : {id: (début, fin)} du littéral
+    JSON de fr (guillemets compris, ou null). Permet de réécrire une traduction sans reformater le fichier.
+    """
+    spans = {}
+    pos = _expect(text, 1 if text.startswith("\ufeff") else 0, "{")
+    while True:
+        pos = _WS.match(text, pos).end()
+        if text[pos:pos + 1] == "}":
+            return spans
+        key, pos = scanstring(text, _expect(text, pos, '"'))
+        pos = _expect(text, _expect(text, pos, ":"), "{")
+        _, pos = scanstring(text, _expect(text, pos, '"'))
+        pos = _WS.match(text, _expect(text, pos, ":")).end()
+        if text.startswith("null", pos):
+            end = pos + 4
+        else:
+            _, end = scanstring(text, _expect(text, pos, '"'))
+        spans[key] = (pos, end)
+        pos = _expect(text, end, "}")
+        pos = _WS.match(text, pos).end()
+        if text[pos:pos + 1] == ",":
+            pos += 1
+
+
+def rewrite_translations(path: Path, translations: dict) -> int:
+    """
+    Remplace les traductions {id: fr} dans path en ne touchant qu'aux littéraux concernés
+    (indentation, ordre, échappements et fin de fichier conservés). Renvoie le nombre d'entrées modifiées.
+    """
+    raw = Path(path).read_bytes()
+    newline = "\r\n" if b"\r\n" in raw else "\n"
+    text = raw.decode("utf-8").replace("\r\n", "\n")
+    spans = translation_spans(text)
+    edits = sorted(((spans[key], fr) for key, fr in translations.items() if key in spans), reverse=True)
+    changed = 0
+    for (start, end), fr in edits:
+        if json.loads(text[start:end]) != fr:
+            text = text[:start] + json.dumps(fr, ensure_ascii=False) + text[end:]
+            changed += 1
+    if changed:
+        tmp = Path(path).with_name(Path(path).name + ".part")
+        tmp.write_bytes(text.replace("\n", newline).encode("utf-8"))
+        tmp.replace(path)
+    return changed
@@ -0,0 +1,227 @@
+"""
+Bouchon local du sous-ensemble de l'API Crowdin v2 utilisé par crowdin_sync.py.
+
+    python crowdin_mock.py [--port 8090] [--token secret]
+    CROWDIN_BASE_URL=http://127.0.0.1:8090/api/v2 CROWDIN_PROJECT_ID=1 CROWDIN_PERSONAL_TOKEN=secret \
+        python crowdin_sync.py
+
+Projet unique en mémoire. Points d'accès (réponses au format Crowdin : {"data": …, "pagination": …}) :
+
+    GET    /projects/{p}/files                              fichiers sources (limit/offset)
+    POST   /storages                                        dépôt d'un fichier (corps brut)
+    POST   /projects/{p}/files                              ajout d'un fichier source depuis un dépôt
+    GET    /projects/{p}/strings?fileId=                    chaînes d'un fichier (limit/offset)
+    PATCH  /projects/{p}/strings                            opérations groupées add / replace / remove
+    GET    /projects/{p}/languages/{l}/translations?fileId= traductions d'un fichier (limit/offset)
+    POST   /projects/{p}/translations/{l}                   import d'un fichier de traductions (partiel)
+
+Les fichiers ont la forme du corpus, {id: {ja: fr}}. Comme le parseur JSON de Crowdin, l'import d'un
+fichier nomme chaque chaîne par son chemin de clé ("id->ja") et lui donne pour texte la valeur ; une
+chaîne ajoutée par PATCH garde l'identifiant et le texte envoyés. Ces règles sont celles de Crowdin,
+réécrites ici sans rien reprendre de crowdin_sync.py, pour que le bouchon reste un témoin indépendant
+de la synchronisation. MockCrowdin.requests compte les appels
+par point d'accès (pour les mesures).
+"""
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import argparse
+import json
+import re
+import threading
+
+MAX_LIMIT = 500
+# Crowdin joint les clés d'un fichier JSON imbriqué par "->" pour nommer la chaîne de chaque valeur.
+PATH_SEPARATOR = "->"
+
+
+def key_path(*keys: str) -> str:
+    """Identifiant donné par le parseur JSON de Crowdin à la valeur au bout du chemin de clés keys."""
+    return PATH_SEPARATOR.join(keys)
+
+
+class MockCrowdin:
+    """État du projet : fichiers, chaînes et traductions (une seule langue suffit au corpus)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files = {}         # fileId -> nom
+        self.strings = {}       # stringId -> {"id", "fileId", "identifier", "text"}
+        self.by_file = {}       # fileId -> {stringId: None}, dans l'ordre de création
+        self.translations = {}  # (stringId, langue) -> texte
+        self.storages = {}
+        self.requests = Counter()
+        self._next = 1
+
+    def _new_id(self) -> int:
+        self._next += 1
+        return self._next
+
+    def add_string(self, file_id: int, identifier: str, text: str) -> dict:
+        string = {"id": self._new_id(), "fileId": file_id, "identifier": identifier, "text": text}
+        self.strings[string["id"]] = string
+        self.by_file.setdefault(file_id, {})[string["id"]] = None
+        return string
+
+    def set_translation(self, file_name: str, identifier: str, text: str, language: str = "fr"):
+        """Simule la saisie d'un traducteur dans Crowdin ; identifier peut n'être que la clé de premier niveau."""
+        with self.lock:
+            file_id = next(i for i, name in self.files.items() if name == file_name)
+            string_id = next(i for i in self.by_file[file_id] if identifier in (self.strings[i]["identifier"], self.strings[i]["identifier"].split(PATH_SEPARATOR, 1)[0]))
+            self.translations[string_id, language] = text
+
+
+def _page(items: list, query: dict) -> dict:
+    limit = min(int(query.get("limit", ["25"])[0]), MAX_LIMIT)
+    offset = int(query.get("offset", ["0"])[0])
+    return {"data": [{"data": item} for item in items[offset:offset + limit]], "pagination": {"offset": offset, "limit": limit}}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    project = None
+    token = None
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _dispatch(self, method: str):
+        body = self._body()
+        if self.headers.get("Authorization") != f"Bearer {self.token}":
+            self._reply(401, {"error": {"code": 401, "message": "Unauthorized"}})
+            return
+        url = urlsplit(self.path)
+        path = re.sub(r"^/api/v2", "", url.path)
+        query = parse_qs(url.query)
+        for pattern, name in ROUTES:
+            match = re.fullmatch(pattern, path)
+            if match and name.startswith(method + " "):
+                self.project.requests[name] += 1
+                with self.project.lock:
+                    status, payload = getattr(self, "_" + name.split(" ", 1)[1])(query, body, *match.groups())
+                self._reply(status, payload)
+                return
+        self._reply(404, {"error": {"code": 404, "message": f"{method} {path}"}})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _list_files(self, query, body, project_id):
+        files = [{"id": i, "name": name} for i, name in sorted(self.project.files.items())]
+        return 200, _page(files, query)
+
+    def _add_storage(self, query, body):
+        storage_id = self.project._new_id()
+        self.project.storages[storage_id] = body
+        return 201, {"data": {"id": storage_id, "fileName": self.headers.get("Crowdin-API-FileName")}}
+
+    def _add_file(self, query, body, project_id):
+        request = json.loads(body)
+        content = json.loads(self.project.storages.pop(request["storageId"]).decode("utf-8-sig"))
+        file_id = self.project._new_id()
+        self.project.files[file_id] = request["name"]
+        for key, value in content.items():
+            for ja, fr in value.items():
+                self.project.add_string(file_id, key_path(key, ja), fr or "")
+        return 201, {"data": {"id": file_id, "name": request["name"]}}
+
+    def _list_strings(self, query, body, project_id):
+        file_id = int(query["fileId"][0])
+        strings = [self.project.strings[i] for i in self.project.by_file.get(file_id, ())]
+        return 200, _page(strings, query)
+
+    def _edit_strings(self, query, body, project_id):
+        result = []
+        for op in json.loads(body):
+            if op["op"] == "add":
+                value = op["value"]
+                result.append(self.project.add_string(value["fileId"], value["identifier"], value["text"]))
+                continue
+            string_id = int(op["path"].split("/")[1])
+            if op["op"] == "replace":
+                self.project.strings[string_id]["text"] = op["value"]
+                result.append(self.project.strings[string_id])
+            elif op["op"] == "remove":
+                string = self.project.strings.pop(string_id)
+                del self.project.by_file[string["fileId"]][string_id]
+                for key in [k for k in self.project.translations if k[0] == string_id]:
+                    del self.project.translations[key]
+        return 200, {"data": [{"data": s} for s in result]}
+
+    def _list_translations(self, query, body, project_id, language):
+        file_id = int(query["fileId"][0])
+        translations = self.project.translations
+        items = [
+            {"stringId": string_id, "contentType": "text/plain", "text": translations[string_id, language]}
+            for string_id in self.project.by_file.get(file_id, ())
+            if (string_id, language) in translations
+        ]
+        return 200, _page(items, query)
+
+    def _upload_translations(self, query, body, project_id, language):
+        request = json.loads(body)
+        content = json.loads(self.project.storages.pop(request["storageId"]).decode("utf-8-sig"))
+        by_identifier = {self.project.strings[i]["identifier"]: i for i in self.project.by_file[request["fileId"]]}
+        for key, value in content.items():
+            for ja, fr in value.items():
+                string_id = by_identifier.get(key_path(key, ja), by_identifier.get(key))
+                if string_id is not None and fr:
+                    self.project.translations[string_id, language] = fr
+        return 200, {"data": {"projectId": int(project_id), "fileId": request["fileId"], "languageId": language}}
+
+
+ROUTES = [
+    (r"/projects/(\d+)/files", "GET list_files"),
+    (r"/storages", "POST add_storage"),
+    (r"/projects/(\d+)/files", "POST add_file"),
+    (r"/projects/(\d+)/strings", "GET list_strings"),
+    (r"/projects/(\d+)/strings", "PATCH edit_strings"),
+    (r"/projects/(\d+)/languages/([\w-]+)/translations", "GET list_translations"),
+    (r"/projects/(\d+)/translations/([\w-]+)", "POST upload_translations"),
+]
+
+
+def serve(project: MockCrowdin = None, port: int = 8090, token: str = "secret", host: str = "127.0.0.1"):
+    """Crée le serveur (non démarré) ; server.project donne accès à l'état du projet."""
+    project = project or MockCrowdin()
+    handler = type("Handler", (MockHandler,), {"project": project, "token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.project = project
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bouchon local de l'API Crowdin v2 pour crowdin_sync.py.")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--token", default="secret")
+    args = parser.parse_args()
+    server = serve(port=args.port, token=args.token, host=args.host)
+    print(f"API Crowdin simulée sur http://{args.host}:{server.server_port}/api/v2 (projet 1, jeton {args.token!r})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Synchronisation incrémentale des fichiers eventTextCs*.json (cf. crowdin.yml) avec Crowdin.
+
+    python crowdin_sync.py [--dry-run] [--prefer crowdin|local] [--push-only | --pull-only] [fichiers...]
+
+Configuration par l'environnement : CROWDIN_PERSONAL_TOKEN, CROWDIN_PROJECT_ID et CROWDIN_BASE_URL
+(défaut : https://api.crowdin.com/api/v2). crowdin_mock.py fournit une API locale pour les essais.
+
+L'index d'état (build/crowdin_state.db) garde, pour chaque segment (fichier, id), l'identifiant de la
+chaîne Crowdin et les empreintes du japonais et du français à la dernière synchronisation. Les fichiers
+sont traités un par un, seul le fichier en cours est en mémoire :
+
+- sources : ids nouveaux, japonais modifiés et ids disparus partent en requêtes PATCH /strings groupées
+  (BATCH opérations par requête) ; un fichier inconnu de Crowdin y est ajouté entier,
+  et son français devient la référence des traductions (rien n'est renvoyé) ;
+- traductions : celles de Crowdin sont lues par pages de PAGE. Un segment modifié d'un seul côté depuis
+  la dernière synchronisation est recopié vers l'autre ; modifié des deux côtés, c'est un conflit que
+  --prefer tranche. Une traduction vide n'en remplace jamais une non vide, et un segment sans traduction
+  dans Crowdin n'est envoyé que si son français a changé depuis la référence ;
+- écriture : les traductions reçues sont réécrites dans Json/ sans reformater le fichier
+  (corpus.rewrite_translations), celles à envoyer partent dans un fichier de traductions partiel.
+
+Un fichier dont l'empreinte n'a pas changé depuis la dernière synchronisation n'est relu que si Crowdin
+apporte des traductions nouvelles.
+"""
+from collections import Counter
+from fnmatch import fnmatch
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from corpus import CORPUS_DIR, corpus_files, file_sha256, iter_entries, rewrite_translations
+
+DEFAULT_STATE = Path(__file__).parent / "build" / "crowdin_state.db"
+DEFAULT_BASE_URL = "https://api.crowdin.com/api/v2"
+SOURCE_PATTERN = "eventTextCs*.json"
+LANGUAGE = "fr"
+PAGE = 500
+BATCH = 500
+# Séparateur du chemin de clé des chaînes importées d'un fichier JSON imbriqué ({id: {ja: fr}} -> "id->ja").
+KEY_SEPARATOR = "->"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, file_id INTEGER NOT NULL, sha256 TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    string_id INTEGER NOT NULL,
+    ja_hash TEXT NOT NULL,
+    fr_hash TEXT,
+    PRIMARY KEY (name, key)
+) WITHOUT ROWID;
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+EMPTY = text_hash("")
+
+
+class CrowdinError(RuntimeError):
+    pass
+
+
+class CrowdinClient:
+    """Sous-ensemble de l'API Crowdin v2 utile à la synchronisation, sur une connexion persistante."""
+
+    def __init__(self, base_url: str, token: str, project_id: int, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.token = token
+        self.project = f"/projects/{project_id}"
+        self.timeout = timeout
+        self.calls = Counter()
+        self._conn = None
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, path: str, params: dict = None, payload=None, raw: bytes = None, headers: dict = None):
+        url = self.prefix + path + (f"?{urlencode(params)}" if params else "")
+        headers = {"Authorization": f"Bearer {self.token}", **(headers or {})}
+        body = raw
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        for attempt in range(3):
+            if self._conn is None:
+                connection = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self._conn = connection(self.host, timeout=self.timeout)
+            try:
+                self._conn.request(method, url, body=body, headers=headers)
+                response = self._conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # Connexion persistante fermée par le serveur entre deux requêtes : on rouvre.
+                self.close()
+                if attempt == 2:
+                    raise
+                continue
+            if response.status == 429 and attempt < 2:
+                time.sleep(float(response.getheader("Retry-After", "1")))
+                continue
+            break
+        self.calls[method] += 1
+        if response.status >= 400:
+            raise CrowdinError(f"{method} {path} : HTTP {response.status} {data[:200].decode('utf-8', 'replace')}")
+        return json.loads(data) if data else None
+
+    def paginate(self, path: str, **params):
+        """Éléments d'une liste paginée, page par page (PAGE éléments par requête)."""
+        offset = 0
+        while True:
+            page = self.request("GET", path, dict(params, limit=PAGE, offset=offset))["data"]
+            for item in page:
+                yield item["data"]
+            if len(page) < PAGE:
+                return
+            offset += PAGE
+
+    def _storage(self, name: str, content: bytes) -> int:
+        headers = {"Crowdin-API-FileName": name, "Content-Type": "application/json"}
+        return self.request("POST", "/storages", raw=content, headers=headers)["data"]["id"]
+
+    def files(self) -> dict:
+        return {f["name"]: f["id"] for f in self.paginate(f"{self.project}/files")}
+
+    def add_file(self, name: str, content: bytes) -> int:
+        payload = {"storageId": self._storage(name, content), "name": name, "type": "json"}
+        return self.request("POST", f"{self.project}/files", payload=payload)["data"]["id"]
+
+    def strings(self, file_id: int):
+        return self.paginate(f"{self.project}/strings", fileId=file_id)
+
+    def edit_strings(self, ops: list) -> list:
+        """Applique les opérations (JSON Patch) par lots de BATCH ; renvoie les chaînes créées ou modifiées."""
+        result = []
+        for i in range(0, len(ops), BATCH):
+            result += [item["data"] for item in self.request("PATCH", f"{self.project}/strings", payload=ops[i:i + BATCH])["data"]]
+        return result
+
+    def translations(self, file_id: int, language: str):
+        return self.paginate(f"{self.project}/languages/{language}/translations", fileId=file_id)
+
+    def upload_translations(self, file_id: int, language: str, name: str, content: bytes):
+        payload = {"storageId": self._storage(name, content), "fileId": file_id, "importEqSuggestions": False}
+        self.request("POST", f"{self.project}/translations/{language}", payload=payload)
+
+
+def segment_of(string: dict) -> tuple:
+    """
+    (id, ja) du segment du corpus correspondant à une chaîne Crowdin. Le parseur JSON de Crowdin nomme
+    les chaînes d'un fichier importé par leur chemin de clé, "id->ja", et leur donne pour texte la
+    valeur (le français) ; celles ajoutées par PATCH /strings ont pour identifiant l'id et pour texte le japonais.
+    """
+    key, separator, ja = string["identifier"].partition(KEY_SEPARATOR)
+    return key, ja if separator else string["text"]
+
+
+def _partial_file(entries: dict) -> bytes:
+    """Fichier au format du corpus limité aux entrées {id: (ja, fr)} données."""
+    return json.dumps({key: {ja: fr} for key, (ja, fr) in entries.items()}, ensure_ascii=False, indent=4).encode("utf-8")
+
+
+def _resolve(local: str, remote: str, base: str, prefer: str):
+    """Côté qui l'emporte pour un segment dont les deux traductions diffèrent : "pull", "push" ou ("conflict", côté)."""
+    local_changed = text_hash(local) != base
+    remote_changed = text_hash(remote) != base
+    if not local:
+        return "pull"
+    if not remote:
+        return "push"
+    if remote_changed and not local_changed:
+        return "pull"
+    if local_changed and not remote_changed:
+        return "push"
+    return "conflict", "pull" if prefer == "crowdin" else "push"
+
+
+def sync_file(client: CrowdinClient, conn: sqlite3.Connection, path: Path, file_id, options) -> Counter:
+    """Synchronise un fichier du corpus ; renvoie les compteurs de ce qui a été (ou serait) fait."""
+    name = path.name
+    stats = Counter()
+    sha = file_sha256(path)
+    row = conn.execute("SELECT file_id, sha256 FROM files WHERE name = ?", (name,)).fetchone()
+    local = None
+    new_file = False
+
+    if file_id is None:
+        if not options.push:
+            return stats
+        stats["new_files"] += 1
+        if options.dry_run:
+            stats["added"] += sum(1 for _ in iter_entries(path))
+            return stats
+        file_id = client.add_file(name, path.read_bytes())
+        row = None
+        new_file = True
+
+    known = row is not None and row[0] == file_id
+    if known:
+        state = {key: [sid, jh, fh] for key, sid, jh, fh in conn.execute(
+            "SELECT key, string_id, ja_hash, fr_hash FROM segments WHERE name = ?", (name,))}
+    else:
+        # Pas d'état pour ce fichier (premier passage, ou fichier recréé dans Crowdin) : on part des chaînes
+        # existantes, sans traduction de référence ; seules les différences de contenu comptent alors.
+        state = {}
+        for string in client.strings(file_id):
+            key, ja = segment_of(string)
+            state[key] = [string["id"], text_hash(ja), None]
+        sha = None
+
+    # Sources : le fichier n'est relu que s'il a changé depuis la dernière synchronisation.
+    if row is None or sha != row[1]:
+        local = {key: (ja, fr) for key, ja, fr in iter_entries(path)}
+    ops, added, removed = [], {}, []
+    if local is not None:
+        for key, (ja, _) in local.items():
+            if key not in state:
+                ops.append({"op": "add", "path": "-", "value": {"text": ja, "identifier": key, "fileId": file_id}})
+                added[key] = ja
+            elif state[key][1] != text_hash(ja):
+                ops.append({"op": "replace", "path": f"/{state[key][0]}/text", "value": ja})
+        # Sans état, une chaîne de Crowdin absente du fichier local n'a pas été vue disparaître
+        # (correspondance inattendue, fichier local en retard) : elle est signalée et laissée hors de
+        # l'index, donc jamais supprimée.
+        missing = [key for key in state if key not in local]
+        if known:
+            removed = missing
+        elif missing:
+            stats["unmatched"] += len(missing)
+            print(f"  {name} : {len(missing)} chaîne(s) Crowdin sans segment local (ex. {missing[0]!r}), conservée(s)")
+            for key in missing:
+                del state[key]
+        ops += [{"op": "remove", "path": f"/{state[key][0]}"} for key in removed]
+    if new_file:
+        # Le fichier vient d'être envoyé avec son français : c'est la référence, rien n'est à renvoyer.
+        for key, entry in state.items():
+            if key in local:
+                entry[2] = text_hash(local[key][1])
+    if ops and options.push:
+        stats["added"] += len(added)
+        stats["edited"] += len(ops) - len(added) - len(removed)
+        stats["removed"] += len(removed)
+        if not options.dry_run:
+            for string in client.edit_strings(ops):
+                key = segment_of(string)[0]
+                if key in added:
+                    state[key] = [string["id"], text_hash(string["text"]), EMPTY]
+                elif key in state:
+                    state[key][1] = text_hash(string["text"])
+            for key in removed:
+                del state[key]
+
+    # Traductions : celles de Crowdin qui diffèrent de la référence obligent à relire le fichier.
+    by_sid = {sid: key for key, (sid, _, _) in state.items()}
+    remote = {}
+    for translation in client.translations(file_id, LANGUAGE):
+        key = by_sid.get(translation["stringId"])
+        if key is not None:
+            remote[key] = translation["text"] or ""
+    if local is None and any(text_hash(text) != state[key][2] for key, text in remote.items()):
+        local = {key: (ja, fr) for key, ja, fr in iter_entries(path)}
+
+    pulls, pushes, pending = {}, {}, bool(ops) and not options.push
+    for key, entry in state.items():
+        if local is None or key not in local:
+            continue
+        ja, fr = local[key]
+        theirs = remote.get(key, "")
+        if fr == theirs:
+            entry[2] = text_hash(fr)
+            continue
+        if not theirs and entry[2] == text_hash(fr):
+            continue
+        decision = _resolve(fr, theirs, entry[2], options.prefer)
+        if isinstance(decision, tuple):
+            stats["conflicts"] += 1
+            print(f"  conflit {name} {key} : local {fr!r}, Crowdin {theirs!r} -> {'Crowdin' if decision[1] == 'pull' else 'local'}")
+            decision = decision[1]
+        if decision == "pull" and options.pull:
+            pulls[key] = theirs
+            entry[2] = text_hash(theirs)
+        elif decision == "push" and options.push:
+            pushes[key] = (ja, fr)
+            entry[2] = text_hash(fr)
+        else:
+            pending = True
+    stats["pulled"] += len(pulls)
+    stats["pushed"] += len(pushes)
+    if options.dry_run:
+        return stats
+
+    if pushes:
+        client.upload_translations(file_id, LANGUAGE, name, _partial_file(pushes))
+    if pulls:
+        rewrite_translations(path, pulls)
+    # Une modification locale laissée en attente (--pull-only) impose de relire le fichier la prochaine fois.
+    sha = "" if pending else file_sha256(path)
+    with conn:
+        conn.execute("DELETE FROM segments WHERE name = ?", (name,))
+        conn.executemany(
+            "INSERT INTO segments (name, key, string_id, ja_hash, fr_hash) VALUES (?, ?, ?, ?, ?)",
+            ((name, key, sid, jh, fh) for key, (sid, jh, fh) in state.items()),
+        )
+        conn.execute("INSERT OR REPLACE INTO files (name, file_id, sha256) VALUES (?, ?, ?)", (name, file_id, sha))
+    return stats
+
+
+def sync(client: CrowdinClient, state_path: Path, paths: list, options) -> Counter:
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(state_path)
+    conn.executescript(SCHEMA)
+    totals = Counter()
+    try:
+        remote_files = client.files()
+        for path in paths:
+            stats = sync_file(client, conn, path, remote_files.get(path.name), options)
+            stats = +stats
+            if stats:
+                print(f"{path.name} : " + ", ".join(f"{k}={v}" for k, v in sorted(stats.items())))
+            totals.update(stats)
+            totals["files"] += 1
+    finally:
+        conn.close()
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synchronise les fichiers eventTextCs du corpus avec Crowdin (changements seulement).")
+    parser.add_argument("files", nargs="*", type=Path, help=f"fichiers à synchroniser (défaut : Json/{SOURCE_PATTERN})")
+    parser.add_argument("--state", type=Path, default=DEFAULT_STATE, help=f"index d'état (défaut : {DEFAULT_STATE})")
+    parser.add_argument("--prefer", choices=["crowdin", "local"], default="crowdin", help="côté retenu en cas de conflit")
+    parser.add_argument("--dry-run", action="store_true", help="affiche les changements sans rien envoyer ni écrire")
+    direction = parser.add_mutually_exclusive_group()
+    direction.add_argument("--push-only", dest="pull", action="store_false", help="n'envoie que les changements locaux")
+    direction.add_argument("--pull-only", dest="push", action="store_false", help="ne récupère que les traductions de Crowdin")
+    args = parser.parse_args()
+
+    token = os.environ.get("CROWDIN_PERSONAL_TOKEN")
+    project_id = os.environ.get("CROWDIN_PROJECT_ID")
+    if not token or not project_id:
+        sys.exit("CROWDIN_PERSONAL_TOKEN et CROWDIN_PROJECT_ID doivent être définis.")
+    paths = args.files or [p for p in corpus_files(CORPUS_DIR) if fnmatch(p.name, SOURCE_PATTERN)]
+    client = CrowdinClient(os.environ.get("CROWDIN_BASE_URL", DEFAULT_BASE_URL), token, int(project_id))
+    t0 = time.perf_counter()
+    try:
+        totals = sync(client, args.state, paths, args)
+    finally:
+        client.close()
+    files = totals.pop("files", 0)
+    print(f"{files} fichier(s) en {time.perf_counter() - t0:.1f} s, {sum(client.calls.values())} requête(s) "
+          f"({', '.join(f'{m} {n}' for m, n in sorted(client.calls.items()))})"
+          + "".join(f", {k}={v}" for k, v in sorted(totals.items())))
+
+
+if __name__ == "__main__":
+    main()
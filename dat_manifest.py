@@ -0,0 +1,59 @@
+"""
+Génère le manifeste de blocs publié à côté des assets de release DAT/IDX.
+
+    python dat_manifest.py data00000000.win32.dat1 data00000000.win32.idx
+
+Écrit data00000000.win32.dat1.blocks.json : le lanceur (main.py) le compare au DAT
+local et ne télécharge que les blocs modifiés (requêtes HTTP Range).
+"""
+from pathlib import Path
+
+import argparse
+import hashlib
+import json
+
+BLOCK_SIZE = 256 * 1024
+
+
+def hash_file(path: Path, block_size: int = 0) -> dict:
+    """Taille, SHA-256 et, si block_size > 0, SHA-256 de chaque bloc du fichier."""
+    whole = hashlib.sha256()
+    blocks = []
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size or BLOCK_SIZE), b""):
+            size += len(block)
+            whole.update(block)
+            if block_size:
+                blocks.append(hashlib.sha256(block).hexdigest())
+    info = {"size": size, "sha256": whole.hexdigest()}
+    if block_size:
+        info["blocks"] = blocks
+    return info
+
+
+def build_manifest(dat: Path, idx: Path, block_size: int = BLOCK_SIZE) -> dict:
+    return {
+        "version": 1,
+        "block_size": block_size,
+        "dat": hash_file(dat, block_size),
+        "idx": hash_file(idx),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère le manifeste de blocs du DAT FR.")
+    parser.add_argument("dat", type=Path, help="data00000000.win32.dat1")
+    parser.add_argument("idx", type=Path, help="data00000000.win32.idx")
+    parser.add_argument("-o", "--output", type=Path, help="fichier de sortie (défaut : <dat>.blocks.json)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help=f"taille des blocs en octets (défaut : {BLOCK_SIZE})")
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.dat, args.idx, args.block_size)
+    output = args.output or args.dat.with_name(args.dat.name + ".blocks.json")
+    output.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    print(f"{output} : {len(manifest['dat']['blocks'])} blocs de {args.block_size} octets.")
+
+
+if __name__ == "__main__":
+    main()
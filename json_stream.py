@@ -0,0 +1,172 @@
+"""
+Lecture en flux des fichiers de traduction JSON, à mémoire bornée.
+
+iter_records(source) produit les enregistrements (id, ja, fr) sans construire le document :
+
+- BY_ID, {id: {ja: fr}} (Json/) : id est la clé ;
+- LIST, [{"ja": …, "fr": …}] (Server-Side-Text) : id vaut entry["id"] s'il existe, sinon la position ;
+- FLAT, {ja: fr} (ancien format Server-Side-Text) : id est la position.
+
+fr vaut "" quand il est null. Seul l'élément de premier niveau en cours est décodé, dans un tampon
+d'environ CHUNK caractères : la mémoire utilisée ne dépend pas de la taille du fichier.
+batches(records, size) les regroupe en lots de taille fixe pour executemany.
+"""
+from itertools import chain, islice
+
+import codecs
+import json
+import os
+import re
+
+CHUNK = 1 << 16
+BY_ID, LIST, FLAT = "{id: {ja: fr}}", '[{"ja", "fr"}]', "{ja: fr}"
+_SCAN = json.JSONDecoder().scan_once
+_WS = re.compile(r"[ \t\n\r]*")
+_COLON = re.compile(r"[ \t\n\r]*:[ \t\n\r]*")
+_SEP = re.compile(r"[ \t\n\r]*([,\]}])[ \t\n\r]*")
+
+
+class _Incomplete(ValueError):
+    """Membre incomplet : erreur de syntaxe, ou simple fin de tampon à compléter."""
+
+
+class _Reader:
+    """Tampon de texte rempli bloc par bloc, avec décodage des valeurs JSON successives."""
+
+    def __init__(self, f, chunk: int):
+        self.f = f
+        self.chunk = chunk
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(self.chunk)
+        text = self.decoder.decode(data, final=not data) if isinstance(data, bytes) else data
+        if not data:
+            self.eof = True
+        self.offset += self.pos
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{message} (position {self.offset + self.pos})")
+
+    def peek(self) -> str:
+        """Prochain caractère non blanc, sans le consommer ; "" en fin de fichier."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def members(self, closing: str):
+        """
+        (clé, valeur) des membres d'un objet (closing "}") ou (None, valeur) d'un tableau ("]").
+        Les membres complets du tampon sont décodés d'affilée ; celui qui déborde du tampon est repris
+        depuis son début une fois le tampon complété.
+        """
+        keyed = closing == "}"
+        scan, colon, sep = _SCAN, _COLON.match, _SEP.match
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            buf, pos = self.buf, self.pos
+            try:
+                while True:
+                    key, end = None, pos
+                    if keyed:
+                        if buf[pos:pos + 1] != '"':
+                            raise _Incomplete("clé attendue")
+                        key, end = scan(buf, pos)
+                        match = colon(buf, end)
+                        if not match:
+                            raise _Incomplete("':' attendu")
+                        end = match.end()
+                    value, end = scan(buf, end)
+                    # Le séparateur qui suit garantit aussi qu'un nombre n'a pas été coupé en fin de tampon.
+                    match = sep(buf, end)
+                    if not match:
+                        raise _Incomplete(f"',' ou '{closing}' attendu")
+                    pos = self.pos = match.end()
+                    yield key, value
+                    if match.group(1) == closing:
+                        return
+                    if match.group(1) != ",":
+                        raise self.error(f"',' ou '{closing}' attendu")
+            except StopIteration:
+                error = "valeur JSON attendue"
+            except json.JSONDecodeError as e:
+                error = e.msg
+            except _Incomplete as e:
+                error = str(e)
+            if self.eof:
+                raise self.error(error)
+            self._fill()
+            self.peek()
+
+
+def _records(reader: _Reader, layouts):
+    opening = reader.peek()
+    if opening not in ("{", "["):
+        raise reader.error("objet ou tableau JSON attendu à la racine")
+    reader.pos += 1
+    members = reader.members("}" if opening == "{" else "]")
+    first = next(members, None)
+    if first is None:
+        if reader.peek():
+            raise reader.error("données après la fin du document")
+        return
+    if opening == "[":
+        layout = LIST
+    else:
+        layout = BY_ID if isinstance(first[1], dict) else FLAT
+    if layouts and layout not in layouts:
+        raise reader.error(f"format {layout} non accepté")
+    members = chain((first,), members)
+    if layout == LIST:
+        for n, (_, value) in enumerate(members):
+            if isinstance(value, dict):
+                fr = value.get("fr", "")
+                yield value.get("id", n), value.get("ja", ""), "" if fr is None else fr
+    elif layout == BY_ID:
+        for key, value in members:
+            try:
+                ((ja, fr),) = value.items()
+            except (AttributeError, ValueError):
+                raise reader.error(f"entrée {key} n'est pas de la forme {layout}") from None
+            yield key, ja, "" if fr is None else fr
+    else:
+        for n, (key, value) in enumerate(members):
+            if isinstance(value, (dict, list)):
+                raise reader.error(f"entrée {key} n'est pas de la forme {layout}")
+            yield n, key, "" if value is None else value
+    if reader.peek():
+        raise reader.error("données après la fin du document")
+
+
+def iter_records(source, layouts=None, chunk: int = CHUNK):
+    """
+    Enregistrements (id, ja, fr) de source (chemin, ou fichier ouvert en binaire ou en texte).
+    layouts restreint les formats acceptés (BY_ID, LIST, FLAT) ; ValueError si le document n'en suit aucun.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _records(_Reader(f, chunk), layouts)
+    else:
+        yield from _records(_Reader(source, chunk), layouts)
+
+
+def batches(records, size: int):
+    """Lots (listes) d'au plus size éléments, pour executemany."""
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,152 @@
+"""
+Serveur HTTP local qui remplace GitHub pour tester le lanceur hors ligne.
+
+    python local_server.py <dossier> [--port 8000] [--fetch-from logs/startup-….json]
+
+Sert les fichiers de <dossier> comme le ferait GitHub pour les assets de release :
+ETag / Last-Modified, réponses 304 (If-None-Match, If-Modified-Since) et requêtes
+Range / If-Range (206), nécessaires à la reprise et au delta du DAT FR.
+
+Avec main.py --mirror http://127.0.0.1:8000/, https://hôte/chemin est demandé ici en /hôte/chemin.
+--fetch-from remplit d'abord <dossier> avec les URL relevées par main.py --profile-startup
+(celles déjà présentes ne sont pas retéléchargées, pour rejouer le lancement à données constantes).
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import unquote, urlsplit
+from urllib.request import Request, urlopen
+
+import argparse
+import json
+import re
+import shutil
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    root = Path(".")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        path = (self.root / unquote(urlsplit(self.path).path).lstrip("/")).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _not_modified(self, etag, mtime):
+        if "If-None-Match" in self.headers:
+            return self.headers["If-None-Match"] == etag
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range(self, etag, size):
+        """Plage demandée (début, fin incluse), ou None pour renvoyer le fichier entier."""
+        match = RANGE_RE.match(self.headers.get("Range", ""))
+        if not match or self.headers.get("If-Range", etag) != etag:
+            return None
+        start, end = match.groups()
+        if not start:
+            return max(size - int(end), 0), size - 1
+        return int(start), min(int(end), size - 1) if end else size - 1
+
+    def do_HEAD(self):
+        self.do_GET(body=False)
+
+    def do_GET(self, body=True):
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        stat = path.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self._not_modified(etag, stat.st_mtime):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        byte_range = self._range(etag, stat.st_size)
+        if byte_range and byte_range[0] >= stat.st_size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{stat.st_size}")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, stat.st_size - 1)
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{stat.st_size}")
+        self.end_headers()
+        if not body:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def serve(root, port=8000, host="127.0.0.1"):
+    """Crée le serveur (non démarré) ; utile pour le lancer dans un thread depuis un script de test."""
+    handler = type("Handler", (StandInHandler,), {"root": Path(root).resolve()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def fetch_into(root, urls) -> int:
+    """Copie chaque URL absente de root dans root/hôte/chemin ; renvoie le nombre de fichiers téléchargés."""
+    fetched = 0
+    for url in dict.fromkeys(urls):
+        parts = urlsplit(url)
+        dest = Path(root) / parts.netloc / unquote(parts.path).lstrip("/")
+        if dest.is_file():
+            continue
+        try:
+            with urlopen(Request(url, headers={"User-Agent": "dqxclarity-updater"}), timeout=60) as r:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                with open(dest, "wb") as f:
+                    shutil.copyfileobj(r, f, 1 << 20)
+        except HTTPError as e:
+            # Les fichiers facultatifs (.sha256, .blocks.json) peuvent ne pas exister.
+            print(f"{url} : HTTP {e.code}, ignoré")
+            continue
+        fetched += 1
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur HTTP local (ETag, 304, Range) pour tester le lanceur.")
+    parser.add_argument("root", help="dossier servi")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--fetch-from", type=Path, help="trace de main.py --profile-startup dont les URL sont copiées dans root")
+    args = parser.parse_args()
+    if args.fetch_from:
+        urls = json.loads(args.fetch_from.read_text(encoding="utf-8"))["otherData"]["urls"]
+        print(f"{fetch_into(args.root, urls)} fichier(s) ajouté(s) au miroir.")
+    server = serve(args.root, args.port, args.host)
+    print(f"Sert {Path(args.root).resolve()} sur http://{args.host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -9,273 +9,841 @@ _D=_J
 _C='launcher'
 _B=_G
 _A=None
+# Les sous-systèmes lourds (hooking, scans, dqxcrypt, tkinter) et urllib.request ne sont importés
+# que par l'option ou l'étape qui s'en sert ; bench_import.py vérifie le budget de démarrage.
 from common.config import UserConfig
 from common.db_ops import create_db_schema
 from common.lib import get_project_root,setup_logging
 from common.process import start_process,wait_for_dqx_to_launch,check_if_running_as_admin,is_dqx_process_running
-from common.update import check_for_updates,download_custom_files,download_dat_files,import_name_overrides,download_file
-from dqxcrypt.dqxcrypt import start_logger
-from hooking.hook import activate_hooks
-from pathlib import Path
-from scans.manager import run_scans
-from scans.walkthrough import loop_scan_for_walkthrough
-import argparse,sys,time,configparser,os
-from common.config import UserConfig
-from common.db_ops import create_db_schema
-from common.lib import get_project_root,setup_logging
-from common.process import start_process,wait_for_dqx_to_launch
 from common.update import download_custom_files,download_dat_files,import_name_overrides
-from dqxcrypt.dqxcrypt import start_logger
-from hooking.hook import activate_hooks
-from pathlib import Path
-from scans.manager import run_scans
-from scans.walkthrough import loop_scan_for_walkthrough
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
-import argparse,sys,time,json,os,sys,glob,shutil,subprocess
-from io import BytesIO
-from pathlib import Path
-from urllib.request import Request,urlopen
-from zipfile import ZipFile as Zip
-from tkinter.filedialog import askdirectory
-import sqlite3, unicodedata
+from dataclasses import dataclass
+from os.path import join as pjoin
 from pathlib import Path
+import argparse,sys,time,configparser,json,os,shutil
+import hashlib, sqlite3, threading, traceback, unicodedata
+# Fichiers livrés avec main.py et copiés à côté de lui dans l'installation de dqxclarity : la mise à jour
+# en place les conserve comme main.py lui-même (tests/test_fichiers_fr.py vérifie la liste).
+FICHIERS_FR = ('clarity_install.py', 'json_stream.py', 'startup_profile.py', 'db_overrides.json')
+try:
+    from clarity_install import UPDATE_BACKUP, UPDATE_STAGING, annuler_maj, installer_release
+    from json_stream import batches, iter_records
+    from startup_profile import MIRROR_ENV, PROFILE, mirror_url
+except ImportError as e:
+    if e.name not in {Path(f).stem for f in FICHIERS_FR}:
+        raise
+    sys.exit(f"{e.name}.py est introuvable : copiez {', '.join(FICHIERS_FR)} à côté de {Path(__file__).name}.")
+
+CHUNK_SIZE = 1 << 20
 
 def _norm_nfkc(s: str) -> str:
     return unicodedata.normalize("NFKC", s or "").strip()
 
-def db_manuelle(log):
+def _assurer_index_ja(conn, table_name):
+    """Crée un index (non unique) sur ja si aucun index existant ne commence par cette colonne."""
+    for row in conn.execute(f'PRAGMA index_list("{table_name}")'):
+        cols = [r[2] for r in conn.execute(f'PRAGMA index_info("{row[1]}")')]
+        if cols[:1] == ["ja"]:
+            return
+    conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_ja" ON "{table_name}"(ja);')
+
+LOT_SST = 5000
+
+
+def _charger_import(conn, rows):
+    """
+    Charge les paires (ja, en) dans la table temporaire _fr_import (la dernière valeur d'un doublon l'emporte,
+    comme dans l'ancien dict {ja: fr}), par lots de LOT_SST : rows peut être un flux. Renvoie le nombre de paires lues.
+    """
+    conn.execute('CREATE TEMP TABLE IF NOT EXISTS "_fr_import" (ja TEXT PRIMARY KEY, en TEXT) WITHOUT ROWID;')
+    conn.execute('DELETE FROM temp."_fr_import";')
+    count = 0
+    for lot in batches(rows, LOT_SST):
+        conn.executemany("""
+            INSERT INTO temp."_fr_import" (ja, en) VALUES (?, ?)
+            ON CONFLICT(ja) DO UPDATE SET en = excluded.en;
+        """, lot)
+        count += len(lot)
+    return count
+
+def _maj_depuis_import(conn, table_name):
+    """UPDATE de en pour les seules lignes dont la valeur diffère de _fr_import ; renvoie le nombre de lignes écrites."""
+    if sqlite3.sqlite_version_info >= (3, 33, 0):
+        return conn.execute(f"""
+            UPDATE "{table_name}" SET en = t.en
+              FROM temp."_fr_import" t
+             WHERE "{table_name}".ja = t.ja AND "{table_name}".en IS NOT t.en;
+        """).rowcount
+    return conn.execute(f"""
+        UPDATE "{table_name}" SET en = (SELECT t.en FROM temp."_fr_import" t WHERE t.ja = "{table_name}".ja)
+         WHERE ja IN (SELECT ja FROM temp."_fr_import")
+           AND en IS NOT (SELECT t.en FROM temp."_fr_import" t WHERE t.ja = "{table_name}".ja);
+    """).rowcount
+
+def _synchroniser_table(conn, table_name, delete_missing=_E):
+    """
+    Aligne table_name sur _fr_import en n'écrivant que la différence : INSERT des ja absents,
+    UPDATE des en modifiés et, si delete_missing, DELETE des ja qui ne sont plus dans le JSON.
+    Renvoie (ajoutées, modifiées, supprimées).
+    """
+    inserted = conn.execute(f"""
+        INSERT INTO "{table_name}" (ja, en)
+        SELECT t.ja, t.en FROM temp."_fr_import" t
+         WHERE NOT EXISTS (SELECT 1 FROM "{table_name}" d WHERE d.ja = t.ja);
+    """).rowcount
+    updated = _maj_depuis_import(conn, table_name)
+    deleted = 0
+    if delete_missing:
+        deleted = conn.execute(f'DELETE FROM "{table_name}" WHERE ja NOT IN (SELECT ja FROM temp."_fr_import");').rowcount
+    return inserted, updated, deleted
+
+def _maj_en_par_ja(conn, table_name, rows):
+    """
+    Mise à jour UPDATE-only de en par ja, ensembliste : les paires (ja, en) sont chargées dans une
+    table temporaire puis appliquées en une seule requête indexée.
+    Renvoie (mises à jour, non trouvées), comptées par ja distinct comme l'ancienne boucle ligne à ligne
+    sur le dict {ja: fr} : un ja présent plusieurs fois dans le fichier ne compte qu'une fois.
+    """
+    _assurer_index_ja(conn, table_name)
+    _charger_import(conn, rows)
+    updated, total = conn.execute(f"""
+        SELECT TOTAL(EXISTS (SELECT 1 FROM "{table_name}" m WHERE m.ja = t.ja)), COUNT(*)
+          FROM temp."_fr_import" t;
+    """).fetchone()
+    _maj_depuis_import(conn, table_name)
+    return int(updated), int(total - updated)
+
+DB_OVERRIDES = Path(__file__).parent / 'db_overrides.json'
+# Correction historique de db_manuelle, appliquée si db_overrides.json manque.
+OVERRIDES_DEFAUT = [(_norm_nfkc("おおきづち"), "items", "Maillet geant")]
+
+
+def _charger_overrides(path):
+    """
+    Corrections manuelles [(ja normalisé NFKC, portée, fr)] : chaque entrée {"ja", "file", "fr"} remplace
+    en pour ce ja dans les lignes de m00_strings dont la colonne file contient "file" (LIKE, sans tenir
+    compte de la casse ; "" = toutes, file NULL compris).
+    """
+    data = json.loads(Path(path).read_text(encoding='utf-8-sig'))
+    overrides = []
+    for i, entry in enumerate(data):
+        if not isinstance(entry, dict) or not entry.get('ja') or not isinstance(entry.get('fr'), str):
+            raise ValueError(f"{Path(path).name} : entrée {i} invalide ({entry!r})")
+        overrides.append((_norm_nfkc(entry['ja']), str(entry.get('file') or ''), entry['fr']))
+    return overrides
+
+
+# Triggers (SQL pur, donc actifs aussi pour les écritures de dqxclarity) qui invalident m00_strings_norm.
+_TRIGGERS_NORM = {
+    'm00_strings_norm_ins': 'AFTER INSERT ON',
+    'm00_strings_norm_upd': 'AFTER UPDATE OF id, ja, file ON',
+    'm00_strings_norm_del': 'AFTER DELETE ON',
+}
+
+
+def _indexer_ja_norm(conn):
+    """
+    Table m00_strings_norm (ja normalisé NFKC, file, id), indexée sur (norm, file) : reconstruite
+    seulement si m00_strings a changé depuis. Les triggers _TRIGGERS_NORM effacent la clé
+    norm:m00_strings de fr_meta à tout INSERT, DELETE ou UPDATE de id, ja ou file ; une table recréée
+    perd ses triggers, ce qui force aussi la reconstruction. Aucun parcours de m00_strings sinon.
+    Renvoie True si l'index a été reconstruit.
+    """
+    conn.execute('CREATE TABLE IF NOT EXISTS "fr_meta" (key TEXT PRIMARY KEY, value TEXT);')
+    conn.execute('CREATE TABLE IF NOT EXISTS "m00_strings_norm" (norm TEXT NOT NULL, file TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (norm, file, id)) WITHOUT ROWID;')
+    triggers = {name for (name,) in conn.execute('SELECT name FROM sqlite_master WHERE type = \'trigger\' AND tbl_name = \'m00_strings\';')}
+    valid = conn.execute('SELECT 1 FROM "fr_meta" WHERE key = \'norm:m00_strings\';').fetchone()
+    if valid and triggers >= _TRIGGERS_NORM.keys():
+        return _H
+    for name, event in _TRIGGERS_NORM.items():
+        conn.execute(f'CREATE TRIGGER IF NOT EXISTS "{name}" {event} "m00_strings" BEGIN DELETE FROM "fr_meta" WHERE key = \'norm:m00_strings\'; END;')
+    conn.execute('DELETE FROM "m00_strings_norm";')
+    # file NULL est indexé comme "" : il fait partie de la clé primaire de m00_strings_norm.
+    conn.executemany('INSERT INTO "m00_strings_norm" (norm, file, id) VALUES (?, ?, ?);',
+                     ((_norm_nfkc(ja), file, id_) for id_, ja, file in conn.execute('SELECT id, ja, coalesce(file, \'\') FROM "m00_strings" WHERE ja IS NOT NULL;').fetchall()))
+    conn.execute('INSERT OR REPLACE INTO "fr_meta" (key, value) VALUES (\'norm:m00_strings\', \'triggers\');')
+    return _G
+
+
+def db_manuelle(log, overrides_path=DB_OVERRIDES):
+    """
+    Applique les corrections manuelles de db_overrides.json à m00_strings, en un lot :
+    chaque correction est une recherche dans l'index m00_strings_norm, et seules les lignes dont
+    en diffère sont écrites. Le ja et la portée de chaque ligne sont revérifiés par l'UPDATE (fonction
+    SQL norm_nfkc). Les corrections sont réappliquées à chaque lancement, dqxclarity pouvant réécrire
+    en ; seul l'index est gardé d'un lancement à l'autre (voir _indexer_ja_norm).
+    """
     db_path = Path(__file__).parent / "misc_files" / "clarity_dialogFR.db"
     if not db_path.exists():
         log.warning(f"DB introuvable: {db_path}")
         return
-
-    ja_target = _norm_nfkc("おおきづち")
-    with sqlite3.connect(db_path) as conn:
+    t0 = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
         cols = [r[1] for r in conn.execute("PRAGMA table_info('m00_strings')")]
         if "file" not in cols:
             log.warning("Colonne 'file' absente de m00_strings : aucune mise à jour effectuée.")
             return
+        conn.create_function('norm_nfkc', 1, _norm_nfkc, deterministic=_G)
+        with conn:
+            _indexer_ja_norm(conn)
+            if Path(overrides_path).exists():
+                overrides = _charger_overrides(overrides_path)
+            else:
+                log.warning(f"{Path(overrides_path).name} introuvable : seule la correction par défaut (おおきづち) est appliquée.")
+                overrides = OVERRIDES_DEFAUT
+            before = conn.total_changes
+            conn.executemany("""
+                UPDATE "m00_strings" SET en = ?3
+                 WHERE id IN (SELECT id FROM "m00_strings_norm" WHERE norm = ?1 AND (?2 = '' OR file LIKE '%' || ?2 || '%'))
+                   AND norm_nfkc(ja) = ?1 AND (?2 = '' OR file LIKE '%' || ?2 || '%')
+                   AND en IS NOT ?3;
+            """, ((norm, scope, fr) for norm, scope, fr in overrides))
+            written = conn.total_changes - before
+        PROFILE.add('rows_written', written)
+        log.info(f"Corrections manuelles : {len(overrides)} entrée(s), {written} ligne(s) modifiée(s) en {int((time.perf_counter() - t0) * 1000)} ms.")
+    except (OSError, ValueError) as e:
+        log.error(f"Corrections manuelles non appliquées : {e}")
+    finally:
+        conn.close()
+
+
+def check_and_update_clarity_inplace(update=_G, version_file='version.update', github_api_url='https://api.github.com/repos/dqx-translation-project/dqxclarity/releases/latest', release_zip_url='https://github.com/dqx-translation-project/dqxclarity/releases/latest/download/dqxclarity.zip', log=None):
+    from urllib.request import Request, urlopen
+    A = 'User-Agent'; B = 'dqxclarity-updater'
+
+    def _info(msg): log.info(msg) if log else print(msg)
+
+    def _warn(msg): log.warning(msg) if log else print(f"[WARN] {msg}")
+
+    def _ok(msg):
+        try:
+            log.success(msg) if log else print(f"[OK] {msg}")
+        except:
+            _info(msg)
+
+    def is_dqx_running(): return os.system('TASKLIST /FI "imagename eq DQXGame.exe" | find "DQXGame" > nul') == 0
+
+    def kill_clarity_exe(): os.system('taskkill /f /im DQXClarity.exe >nul 2>&1')
+
+    def get_latest_tag():
+        PROFILE.url(github_api_url)
+        req = Request(mirror_url(github_api_url), headers={A: B})
+        with urlopen(req, timeout=15) as r:
+            data = json.loads(r.read().decode(_I))
+        tag = data['tag_name']
+        return tag[1:] if tag.startswith('v') else tag
+
+    def download_latest_zip(dest):
+        """Écrit le zip de la release dans dest par blocs, sans le garder en mémoire."""
+        PROFILE.url(release_zip_url)
+        req = Request(mirror_url(release_zip_url), headers={A: B})
+        with urlopen(req, timeout=30) as r:
+            if getattr(r, 'status', 200) != 200:
+                raise RuntimeError(f"HTTP {getattr(r, 'status', '?')} on release zip")
+            with open(dest, 'wb') as f:
+                shutil.copyfileobj(r, f, CHUNK_SIZE)
+        PROFILE.add('bytes_downloaded', dest.stat().st_size)
+
+    _info('Checking dqxclarity repo for updates...')
+    root = Path(__file__).parent.resolve(); this_file = Path(__file__).name
+    if annuler_maj(root):
+        _warn('The previous update was interrupted. The previous install has been restored.')
+    if not (root / version_file).exists():
+        _warn("Couldn't determine current version of dqxclarity. Running as is.")
+        return _H
+    try:
+        cur_ver = (root / version_file).read_text(encoding=_I).strip()
+    except Exception as e:
+        _warn(f"Failed to read {version_file}: {e}")
+        return _H
+    try:
+        new_ver = get_latest_tag()
+    except Exception as e:
+        _warn(f"There was a problem trying to check latest version.\n{e}")
+        return _H
+    if new_ver == cur_ver:
+        _ok(f"Up to date. Version: {cur_ver}")
+        return _G
+    _warn(f"Out of date! {cur_ver} -> {new_ver}")
+    if not update:
+        return _G
+    if is_dqx_running():
+        _warn('DQXGame.exe is running. Close the game before updating.')
+        return _H
+    _info('Preparing in-place update...'); kill_clarity_exe()
+    staging = root / UPDATE_STAGING
+    shutil.rmtree(staging, ignore_errors=_G)
+    staging.mkdir(parents=_G)
+    try:
+        zip_path = staging / 'dqxclarity.zip'
+        try:
+            download_latest_zip(zip_path)
+        except Exception as e:
+            _warn(f"Failed to download latest release zip.\n{e}")
+            return _H
+        ignored_files = {_J, 'dqxclarityFR.exe', this_file, *FICHIERS_FR}
+        ignored_directories = {_K, 'logs', 'venv', UPDATE_STAGING, UPDATE_BACKUP}
+        try:
+            changed, removed, unchanged = installer_release(root, zip_path, ignored_files, ignored_directories, _warn)
+        except Exception as e:
+            _warn(f"Update failed, the previous install has been restored.\n{e}")
+            return _H
+    finally:
+        shutil.rmtree(staging, ignore_errors=_G)
+    _info(f"{len(changed)} file(s) updated, {len(removed)} removed, {unchanged} unchanged.")
+    # Le venv n'est reconstruit que si les dépendances ont changé.
+    if 'requirements.txt' in changed:
+        shutil.rmtree(root / 'venv', ignore_errors=_G)
+    _ok('Update completed in place. Exiting so the launcher can restart cleanly.'); sys.exit(0)
+
+@dataclass(frozen=_B)
+class ReglagesLanceur:
+    """
+    Instantané typé des sections [launcher] et [config] de user_settings.ini.
+    Une nouvelle option du lanceur s'ajoute ici (champ + lecture dans lire), sans nouvelle lecture du fichier.
+    """
+    language: str = ''
+    patchdaily: bool = _E
+    serversidefr: bool = _E
+    installdirectory: str = ''
+
+    @property
+    def fr(self):
+        return self.language.upper() == 'FR'
+
+    @classmethod
+    def lire(cls, config_path):
+        parser = configparser.ConfigParser()
+        parser.read(config_path, encoding=_F)
+
+        def _option(section, name):
+            return parser.get(section, name, fallback='').strip()
+
+        return cls(
+            language=_option(_C, 'language'),
+            patchdaily=_option(_C, 'patchdaily').lower() == 'true',
+            serversidefr=_option(_C, 'serversidefr').lower() == 'true',
+            installdirectory=_option('config', 'installdirectory'),
+        )
+
+
+_REGLAGES = {}
+_REGLAGES_LOCK = threading.Lock()
+
+
+def reglages(config_path=_D):
+    """
+    Réglages du lanceur, partagés par tout le lancement : le fichier n'est relu que si sa date
+    ou sa taille a changé depuis la dernière lecture (par exemple après un UserConfig.update).
+    """
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        return ReglagesLanceur()
+    key = (st.st_mtime_ns, st.st_size)
+    path = os.path.abspath(config_path)
+    with _REGLAGES_LOCK:
+        cached = _REGLAGES.get(path)
+        if cached is _A or cached[0] != key:
+            cached = _REGLAGES[path] = (key, ReglagesLanceur.lire(config_path))
+        return cached[1]
+
+
+def _invalider_reglages():
+    """À appeler après une écriture de user_settings.ini, au cas où sa date n'aurait pas changé."""
+    with _REGLAGES_LOCK:
+        _REGLAGES.clear()
+
 
-        # Mise à jour ciblée
-        cur = conn.execute("""
-            UPDATE "m00_strings"
-               SET en = ?
-             WHERE ja = ?
-               AND file LIKE '%' || ? || '%';
-        """, ("Maillet geant", ja_target, "items"))
-        conn.commit()
-
-def check_and_update_clarity_inplace(update=_G,version_file='version.update',github_api_url='https://api.github.com/repos/dqx-translation-project/dqxclarity/releases/latest',release_zip_url='https://github.com/dqx-translation-project/dqxclarity/releases/latest/download/dqxclarity.zip',log=None):
-        C='dqxclarity/';B='dqxclarity-updater';A='User-Agent';import json,os,sys,glob,shutil;from io import BytesIO;from pathlib import Path;from urllib.request import Request,urlopen;from zipfile import ZipFile as Zip;from contextlib import suppress
-        def _info(msg):log.info(msg)if log else print(msg)
-        def _warn(msg):log.warning(msg)if log else print(f"[WARN] {msg}")
-        def _ok(msg):
-                try:log.success(msg)if log else print(f"[OK] {msg}")
-                except:_info(msg)
-        def is_dqx_running():return os.system('TASKLIST /FI "imagename eq DQXGame.exe" | find "DQXGame" > nul')==0
-        def kill_clarity_exe():os.system('taskkill /f /im DQXClarity.exe >nul 2>&1')
-        def delete_path(p):
-                with suppress(Exception):
-                        if p.is_dir():shutil.rmtree(p,ignore_errors=_G)
-                        else:p.unlink()
-        def get_latest_tag():
-                req=Request(github_api_url,headers={A:B})
-                with urlopen(req,timeout=15)as r:data=json.loads(r.read().decode(_I))
-                tag=data['tag_name'];return tag[1:]if tag.startswith('v')else tag
-        def download_latest_zip():
-                C='status';req=Request(release_zip_url,headers={A:B})
-                with urlopen(req,timeout=30)as r:
-                        if getattr(r,C,200)!=200:raise RuntimeError(f"HTTP {getattr(r,C,'?')} on release zip")
-                        return Zip(BytesIO(r.read()))
-        def _ensure_dir(path):
-                'Crée le dossier; si un fichier existe à la place, on le remplace par un dossier.'
-                if path.exists():
-                        if path.is_dir():return
-                        with suppress(Exception):path.unlink()
-                path.mkdir(parents=_G,exist_ok=_G)
-        _info('Checking dqxclarity repo for updates...');root=Path(__file__).parent.resolve();this_file=Path(__file__).name
-        if not(root/version_file).exists():_warn("Couldn't determine current version of dqxclarity. Running as is.");return _H
-        try:cur_ver=(root/version_file).read_text(encoding=_I).strip()
-        except Exception as e:_warn(f"Failed to read {version_file}: {e}");return _H
-        try:new_ver=get_latest_tag()
-        except Exception as e:_warn(f"There was a problem trying to check latest version.\n{e}");return _H
-        if new_ver==cur_ver:_ok(f"Up to date. Version: {cur_ver}");return _G
-        _warn(f"Out of date! {cur_ver} -> {new_ver}")
-        if not update:return _G
-        if is_dqx_running():_warn('DQXGame.exe is running. Close the game before updating.');return _H
-        _info('Preparing in-place update...');kill_clarity_exe()
-        try:zf=download_latest_zip()
-        except Exception as e:_warn(f"Failed to download latest release zip.\n{e}");return _H
-        ignored_files={_J,'dqxclarityFR.exe',this_file};ignored_directories={_K,'logs'}
-        for path_str in glob.glob(str(root/'**'),recursive=_G):
-                p=Path(path_str)
-                if p==root:continue
-                if p.name in ignored_files:continue
-                if any(part in ignored_directories for part in p.parts):continue
-                with suppress(Exception):
-                        if p.exists()and p.samefile(root/this_file):continue
-                delete_path(p)
-        for info in zf.infolist():
-                name=info.filename.replace('\\','/')
-                if name.startswith(C):name=name[len(C):]
-                if not name:continue
-                is_dir=info.is_dir()if hasattr(info,'is_dir')else name.endswith('/');parts=Path(name).parts
-                if any(seg in ignored_directories for seg in parts):continue
-                if Path(name).name in ignored_files:continue
-                target=(root/name).resolve()
-                if root not in target.parents and target!=root:_warn(f"Skipped unsafe path outside root: {target}");continue
-                if is_dir:_ensure_dir(target);continue
-                _ensure_dir(target.parent)
-                with zf.open(info,'r')as src,open(target,'wb')as dst:shutil.copyfileobj(src,dst)
-        delete_path(root/'venv');_ok('Update completed in place. Exiting so the launcher can restart cleanly.');sys.exit(0)
 def is_fr_launcher(config_path=_D):
-        'Retourne True si [launcher] language = FR dans user_settings.ini';A='language'
-        if not os.path.isfile(config_path):return _E
-        parser=configparser.ConfigParser();parser.read(config_path,encoding=_F);return parser.has_section(_C)and parser.has_option(_C,A)and parser.get(_C,A).strip().upper()=='FR'
+        'Retourne True si [launcher] language = FR dans user_settings.ini'
+        return reglages(config_path).fr
 def is_patchdaily_enabled(config_path=_D):
-        'Retourne True si [launcher] patchdaily = True dans user_settings.ini';A='patchdaily'
-        if not os.path.isfile(config_path):return _E
-        parser=configparser.ConfigParser();parser.read(config_path,encoding=_F);return parser.has_section(_C)and parser.has_option(_C,A)and parser.get(_C,A).strip().lower()=='true'
+        'Retourne True si [launcher] patchdaily = True dans user_settings.ini'
+        return reglages(config_path).patchdaily
 def is_serversidefr_enabled(config_path=_D):
-        'Retourne True si [launcher] serversidefr = True dans user_settings.ini';A='serversidefr'
-        if not os.path.isfile(config_path):return _E
-        parser=configparser.ConfigParser();parser.read(config_path,encoding=_F);return parser.has_section(_C)and parser.has_option(_C,A)and parser.get(_C,A).strip().lower()=='true'
+        'Retourne True si [launcher] serversidefr = True dans user_settings.ini'
+        return reglages(config_path).serversidefr
+
+
+SST_BASE_URL = 'https://raw.githubusercontent.com/Sato2Carte/Server-Side-Text/SSTFR/fr/'
+SST_FILES = ['fixed_dialog_template.json', 'm00_strings.json', 'quests.json', 'story_so_far_template.json', 'walkthrough.json', 'glossary.json']
+
+
+def _chemin_db_fr():
+    os.makedirs(Path(__file__).parent / _K, exist_ok=_B)
+    return Path(__file__).parent / _K / 'clarity_dialogFR.db'
+
+
+def _assurer_schema_table(conn, table_name, log, unique_idx=_B):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS "{table_name}" (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ja TEXT,
+            en TEXT
+        );
+    ''')
+    if unique_idx:
+        try:
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_ja ON "{table_name}"(ja);')
+        except Exception as ie:
+            log.warning(f"Index unique non créé pour {table_name}: {ie}")
+
+
+def _assurer_schema_fixed_dialog(conn, log):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS "fixed_dialog_template" (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ja TEXT,
+            en TEXT,
+            bad_string INTEGER NOT NULL DEFAULT 0
+        );
+    ''')
+    try:
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_fixed_dialog_template_ja ON "fixed_dialog_template"(ja);')
+    except Exception as ie:
+        log.warning(f"Index unique non créé pour fixed_dialog_template: {ie}")
+
+
+def _lignes_sst(records):
+    """Paires (ja, en) nettoyées, sans ja vide, à partir des enregistrements (id, ja, fr) lus en flux."""
+    for _, ja, fr in records:
+        ja = str(ja).strip() if ja else ''
+        if ja:
+            yield ja, str(fr).strip()
+
+
+def _cache_sst():
+    path = Path(__file__).parent / _K / 'sst_cache'
+    path.mkdir(parents=_B, exist_ok=_B)
+    return path
+
+
+# Levé par _executer_etapes quand une étape demande l'arrêt (sys.exit de la mise à jour en place) :
+# les téléchargements des autres étapes s'interrompent au bloc suivant au lieu d'aller à leur terme.
+_ARRET = threading.Event()
+
+
+class _Annulation(Exception):
+    pass
+
+
+def _verifier_arret():
+    if _ARRET.is_set():
+        raise _Annulation('lancement interrompu')
+
+
+def _telecharger_conditionnel(url, path, entry, retries=3):
+    """
+    GET conditionnel (If-None-Match / If-Modified-Since) vers le fichier en cache path.
+    Renvoie (entrée d'index {etag, last_modified, sha256}, True si le contenu a été téléchargé).
+    """
+    headers = {}
+    if entry and path.exists():
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    last_err = _A
+    for attempt in range(1, retries + 1):
+        try:
+            with _http_get(url, headers=headers) as r:
+                if r.status_code == 304:
+                    return entry, _H
+                h = hashlib.sha256()
+                part = path.with_name(path.name + '.part')
+                with open(part, 'wb') as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        _verifier_arret()
+                        h.update(chunk)
+                        f.write(chunk)
+                        PROFILE.add('bytes_downloaded', len(chunk))
+                os.replace(part, path)
+                return {'etag': r.headers.get('ETag'), 'last_modified': r.headers.get('Last-Modified'), 'sha256': h.hexdigest()}, _G
+        except _Annulation:
+            raise
+        except Exception as e:
+            last_err = e
+            _ARRET.wait(min(2 * attempt, 5))
+            _verifier_arret()
+    raise last_err
+
+
+def _recuperer_sst(log):
+    """
+    Récupère les fichiers Server-Side-Text en parallèle dans misc_files/sst_cache (requêtes
+    conditionnelles : un fichier inchangé coûte un 304). Renvoie {table: (sha256, chemin)} ;
+    en cas d'échec réseau, la dernière copie en cache est utilisée si elle existe.
+    """
+    cache_dir = _cache_sst()
+    index_path = cache_dir / 'index.json'
+    try:
+        index = json.loads(index_path.read_text(encoding=_F))
+    except Exception:
+        index = {}
+
+    def _fetch(file_name):
+        with PROFILE.phase(f'GET {file_name}', cat='io'):
+            return _telecharger_conditionnel(SST_BASE_URL + file_name, cache_dir / file_name, index.get(file_name))
+
+    with ThreadPoolExecutor(max_workers=len(SST_FILES)) as pool:
+        futures = {file_name: pool.submit(_fetch, file_name) for file_name in SST_FILES}
+    _verifier_arret()
+    staged, downloaded = {}, 0
+    for file_name, future in futures.items():
+        try:
+            entry, fresh = future.result()
+            index[file_name] = entry
+            downloaded += fresh
+        except Exception as e:
+            entry = index.get(file_name)
+            if not entry or not (cache_dir / file_name).exists():
+                log.error(f"Échec du téléchargement de {SST_BASE_URL + file_name} : {e}")
+                continue
+            log.warning(f"Échec du téléchargement de {file_name} ({e}) ; utilisation du cache local.")
+        staged[file_name.replace('.json', '')] = (entry['sha256'], cache_dir / file_name)
+    tmp = index_path.with_name('index.json.part')
+    tmp.write_text(json.dumps(index, indent=2), encoding=_F)
+    os.replace(tmp, index_path)
+    log.info(f"Server-Side-Text : {downloaded} fichier(s) téléchargé(s), {len(staged) - downloaded} inchangé(s).")
+    return staged
+
+
+def _appliquer_table(conn, table, path, log):
+    """
+    Applique le fichier SST path (formats liste [{ja, fr}] ou dict {ja: fr}, lu en flux) à table dans la
+    transaction en cours, en n'écrivant que les lignes qui changent.
+    Renvoie (lignes reçues, lignes écrites, résumé pour le log).
+    """
+    rows = _lignes_sst(iter_records(path))
+    if table == 'm00_strings':
+        _assurer_schema_table(conn, table, log, unique_idx=_E)
+        updated, skipped = _maj_en_par_ja(conn, table, rows)
+        return updated + skipped, updated, f"{table}: {updated} MAJ, {skipped} non trouvées (UPDATE-only)"
+    count = _charger_import(conn, rows)
+    if table == 'fixed_dialog_template':
+        _assurer_schema_fixed_dialog(conn, log)
+        _assurer_schema_table(conn, 'dialog', log)
+        # fixed_dialog_template reflète exactement le JSON (ja retirés supprimés, bad_string remis à 0) ;
+        # dialog ne reçoit que les ajouts et modifications, sans suppression.
+        ins, upd, dele = _synchroniser_table(conn, table, delete_missing=_B)
+        conn.execute('UPDATE "fixed_dialog_template" SET bad_string = 0 WHERE bad_string != 0;')
+        d_ins, d_upd, _ = _synchroniser_table(conn, 'dialog')
+        return count, ins + upd + dele + d_ins + d_upd, (f"{table}: {ins} ajoutées, {upd} modifiées, {dele} supprimées ; "
+                       f"dialog: {d_ins} ajoutées, {d_upd} modifiées ({count} lignes reçues)")
+    _assurer_schema_table(conn, table, log)
+    ins, upd, _ = _synchroniser_table(conn, table)
+    return count, ins + upd, f"{table}: {ins} ajoutées, {upd} modifiées ({count} lignes reçues)"
+
+
+def _ingerer_sst(log, staged):
+    """
+    Injecte les tables SST en une seule session SQLite : une connexion, pragmas de chargement
+    en masse, une transaction. En cas d'erreur, rien n'est appliqué (la DB reste dans son état précédent).
+    Chaque table est resynchronisée à chaque lancement, même si le fichier SST n'a pas changé :
+    dqxclarity écrit dans les mêmes tables (et ajoute des lignes à m00_strings), et la synchronisation
+    n'écrit que les lignes qui diffèrent.
+    """
+    if not staged:
+        return
+    conn = sqlite3.connect(_chemin_db_fr(), isolation_level=_A)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL;')
+        conn.execute('PRAGMA synchronous=NORMAL;')
+        conn.execute('PRAGMA cache_size=-65536;')
+        # _fr_import reçoit tout un fichier SST : sur disque, sa mémoire reste bornée par le cache de temp.
+        conn.execute('PRAGMA temp_store=FILE;')
+        t_total = time.perf_counter()
+        conn.execute('BEGIN IMMEDIATE;')
+        try:
+            conn.execute('CREATE TABLE IF NOT EXISTS "fr_meta" (key TEXT PRIMARY KEY, value TEXT);')
+            # Les résumés ne sont journalisés qu'après le COMMIT : une table suivante en échec annule tout.
+            summaries = []
+            for table, (sha256, path) in staged.items():
+                t0 = time.perf_counter()
+                with PROFILE.phase(f'sst:{table}', cat='db'):
+                    count, written, summary = _appliquer_table(conn, table, path, log)
+                    PROFILE.add('rows_written', written)
+                # Empreinte du dernier fichier appliqué, enregistrée dans la même transaction que les données.
+                conn.execute('INSERT OR REPLACE INTO "fr_meta" (key, value) VALUES (?, ?);', (f'sst:{table}', sha256))
+                elapsed = time.perf_counter() - t0
+                summaries.append(f"✅ {summary} en {int(elapsed * 1000)} ms ({int(count / elapsed) if elapsed else count} lignes/s).")
+            conn.execute('COMMIT;')
+        except Exception:
+            conn.execute('ROLLBACK;')
+            raise
+        for summary in summaries:
+            log.info(summary)
+        if summaries:
+            log.info(f"DB FR mise à jour ({len(summaries)} tables) en {int((time.perf_counter() - t_total) * 1000)} ms.")
+    except Exception as e:
+        log.error(f"Erreur d'injection, aucune modification appliquée : {e}")
+    finally:
+        conn.close()
+
+
 def mettre_a_jour_db_fr(log):
-        '\n    Met à jour la DB FR depuis GitHub (SSTFR/fr) en une seule fonction.\n    - Importe sqlite3/json/time/Path en interne (évite NameError).\n    - Utilise common.update.download_with_retry si dispo, sinon fallback requests + retry.\n    ';D='PRAGMA synchronous=NORMAL;';C='PRAGMA journal_mode=DELETE;';B=_K;A='';import os,time,json,sqlite3;from pathlib import Path
-        try:from common.update import download_with_retry as _dl
-        except Exception:_dl=_A
-        try:import requests
-        except Exception:requests=_A
-        def _download(url,retries=3,timeout=30):
-                if _dl is not _A:return _dl(url)
-                if requests is _A:raise RuntimeError('Aucun téléchargeur disponible (ni common.update.download_with_retry ni requests).')
-                last_err=_A
-                for attempt in range(1,retries+1):
-                        try:r=requests.get(url,timeout=timeout);r.raise_for_status();return r
-                        except Exception as e:last_err=e;time.sleep(min(2*attempt,5))
-                raise last_err
-        try:create_db_schema()
-        except NameError:log.warning('create_db_schema() introuvable : on continue quand même.')
-        GITHUB_BASE='https://raw.githubusercontent.com/Sato2Carte/Server-Side-Text/SSTFR/fr/';json_files=['fixed_dialog_template.json','m00_strings.json','quests.json','story_so_far_template.json','walkthrough.json','glossary.json'];os.makedirs(Path(__file__).parent/B,exist_ok=_B);db_path=Path(__file__).parent/B/'clarity_dialogFR.db'
+    '''
+    Met à jour la DB FR depuis GitHub (SSTFR/fr).
+    - Télécharge d'abord tous les fichiers (en parallèle, via un cache local conditionnel),
+      puis injecte en une seule transaction les tables dont le contenu a changé.
+    '''
+    try:
+        create_db_schema()
+    except NameError:
+        log.warning('create_db_schema() introuvable : on continue quand même.')
+    _ingerer_sst(log, _recuperer_sst(log))
+
+
+def _http_get(url, headers=None, timeout=30):
+    """GET en streaming via requests (dépendance de dqxclarity). Lève une exception si le code HTTP >= 400."""
+    import requests
+    PROFILE.url(url)
+    response = requests.get(mirror_url(url), headers=headers or {}, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return response
+
+
+def _sha256_fichier(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sha256_publie(url):
+    """Empreinte publiée à côté de l'asset (url + ".sha256"), ou None si la release n'en fournit pas."""
+    try:
+        with _http_get(url + ".sha256", timeout=15) as r:
+            return r.text.split()[0].strip().lower()
+    except Exception:
+        return None
+
+
+def _telecharger_fichier(url, dest, log, sha256=None, retries=3):
+    """
+    Télécharge url par blocs dans dest + ".part" et renvoie le chemin du .part vérifié.
+    - Reprend un .part existant via un en-tête HTTP Range (206), repart de zéro sinon.
+    - Vérifie la taille annoncée par le serveur puis, si fourni, le SHA-256.
+    Le remplacement de dest (os.replace) reste à la charge de l'appelant.
+    """
+    part = dest + ".part"
+    etag_file = part + ".etag"
+    last_err = None
+    for attempt in range(1, retries + 1):
+        # On ne reprend un .part que si l'on connaît l'ETag de l'asset d'origine :
+        # avec If-Range, le serveur renvoie le fichier complet (200) s'il a changé.
+        offset, headers = 0, {}
+        if os.path.exists(part) and os.path.exists(etag_file):
+            offset = os.path.getsize(part)
+            headers = {"Range": f"bytes={offset}-", "If-Range": Path(etag_file).read_text(encoding=_I)}
+        try:
+            with _http_get(url, headers=headers) as r:
+                if offset and r.status_code == 206:
+                    mode = "ab"
+                    total = int(r.headers["Content-Range"].rsplit("/", 1)[1])
+                    log.info(f"Reprise de {os.path.basename(dest)} à {offset} octets.")
+                else:
+                    mode = "wb"
+                    length = r.headers.get("Content-Length")
+                    total = int(length) if length else _A
+                    etag = r.headers.get("ETag")
+                    if etag:
+                        Path(etag_file).write_text(etag, encoding=_I)
+                    else:
+                        with suppress(Exception):
+                            os.remove(etag_file)
+                with open(part, mode) as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        _verifier_arret()
+                        if chunk:
+                            f.write(chunk)
+                            PROFILE.add('bytes_downloaded', len(chunk))
+        except _Annulation:
+            raise
+        except Exception as e:
+            status = getattr(getattr(e, "response", _A), "status_code", _A)
+            if status == 416:
+                # .part plus long que le fichier distant : on recommence de zéro.
+                with suppress(Exception):
+                    os.remove(part)
+            elif status is not _A and 400 <= status < 500:
+                raise
+            last_err = e
+            log.warning(f"Téléchargement interrompu ({url}, essai {attempt}/{retries}) : {e}")
+            _ARRET.wait(min(2 * attempt, 5))
+            _verifier_arret()
+            continue
+        size = os.path.getsize(part)
+        if total is not _A and size != total:
+            last_err = IOError(f"taille reçue {size} octets, attendue {total}")
+            log.warning(f"Téléchargement incomplet ({url}) : {last_err}")
+            continue
+        if sha256 and _sha256_fichier(part) != sha256:
+            os.remove(part)
+            raise IOError(f"SHA-256 invalide pour {url}")
+        with suppress(Exception):
+            os.remove(etag_file)
+        return part
+    raise last_err
+
+
+def _telecharger_premier(urls, dest, label, log, sha256=_A):
+    """Essaie chaque URL dans l'ordre et renvoie le .part du premier téléchargement vérifié."""
+    last_err = _A
+    for url in urls:
         try:
-                with sqlite3.connect(db_path)as conn:conn.execute(C);conn.execute(D);conn.execute('DELETE FROM "fixed_dialog_template";');conn.commit();log.info('🧹 Table fixed_dialog_template vidée.')
-        except Exception as e:log.warning(f"Impossible de vider fixed_dialog_template: {e}")
-        def ensure_table_schema(conn,table_name,unique_idx=_B):
-                conn.execute(f'''
-            CREATE TABLE IF NOT EXISTS "{table_name}" (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ja TEXT,
-                en TEXT
-            );
-        ''')
-                if unique_idx:
-                        try:conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_ja ON "{table_name}"(ja);')
-                        except Exception as ie:log.warning(f"Index unique non créé pour {table_name}: {ie}")
-        def ensure_dialog_schema(conn):
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS "dialog" (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ja TEXT,
-                    en TEXT
-                );
-            """)
+            return _telecharger_fichier(url, dest, log, sha256=sha256 or _sha256_publie(url))
+        except _Annulation:
+            raise
+        except Exception as e:
+            last_err = e
+            log.warning(f"Échec depuis {url} ({e}); tentative suivante…")
+    raise last_err or RuntimeError(f"Impossible de télécharger le fichier {label} FR.")
+
+
+DELTA_MAX_RATIO = 0.5
+
+
+def _lire_manifeste_blocs(dat_url):
+    """Manifeste de blocs publié à côté du DAT (dat_url + ".blocks.json", voir dat_manifest.py), ou None."""
+    try:
+        with _http_get(dat_url + ".blocks.json", timeout=15) as r:
+            manifest = r.json()
+    except Exception:
+        return _A
+    return manifest if manifest.get("version") == 1 else _A
+
+
+def _empreintes_blocs(path, block_size):
+    """SHA-256 de chaque bloc du fichier et SHA-256 du fichier entier, en une seule lecture."""
+    blocks, whole = [], hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            whole.update(block)
+            blocks.append(hashlib.sha256(block).hexdigest())
+    return blocks, whole.hexdigest()
+
+
+def _plages_modifiees(indices, block_size, size):
+    """Regroupe des indices de blocs consécutifs en plages d'octets [début, fin] (fin incluse)."""
+    ranges = []
+    for i in indices:
+        start = i * block_size
+        end = min(start + block_size, size) - 1
+        if ranges and ranges[-1][1] + 1 == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def _patch_delta(url, dest, info, block_size, log):
+    """
+    Reconstruit dest à partir du fichier local en ne téléchargeant que les blocs qui diffèrent du manifeste.
+    Renvoie dest s'il est déjà à jour, le fichier ".delta" vérifié sinon, ou None si un
+    téléchargement complet est plus intéressant (pas de fichier local, trop de blocs modifiés).
+    """
+    if not os.path.isfile(dest):
+        return _A
+    local_blocks, local_sha = _empreintes_blocs(dest, block_size)
+    if local_sha == info["sha256"]:
+        return dest
+    remote_blocks = info["blocks"]
+    changed = [i for i, h in enumerate(remote_blocks) if i >= len(local_blocks) or local_blocks[i] != h]
+    if len(changed) > DELTA_MAX_RATIO * len(remote_blocks):
+        log.info(f"{len(changed)}/{len(remote_blocks)} blocs modifiés : téléchargement complet.")
+        return _A
+    work = dest + ".delta"
+    shutil.copyfile(dest, work)
+    downloaded = 0
+    try:
+        with open(work, "r+b") as f:
+            f.truncate(info["size"])
+            for start, end in _plages_modifiees(changed, block_size, info["size"]):
+                with _http_get(url, headers={"Range": f"bytes={start}-{end}"}) as r:
+                    if r.status_code != 206:
+                        raise IOError("le serveur ne gère pas les requêtes Range")
+                    f.seek(start)
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        _verifier_arret()
+                        f.write(chunk)
+                        downloaded += len(chunk)
+                        PROFILE.add('bytes_downloaded', len(chunk))
+        if _sha256_fichier(work) != info["sha256"]:
+            raise IOError("SHA-256 invalide après application des blocs")
+    except Exception:
+        with suppress(Exception):
+            os.remove(work)
+        raise
+    log.info(f"Delta {os.path.basename(dest)} : {len(changed)}/{len(remote_blocks)} blocs, {downloaded} octets téléchargés.")
+    return work
+
+
+def _obtenir_fichier(urls, dest, label, manifest, key, log):
+    """
+    Renvoie dest s'il correspond déjà au manifeste, sinon un fichier temporaire vérifié à renommer :
+    par delta de blocs quand le manifeste les fournit, sinon par téléchargement complet.
+    """
+    with PROFILE.phase(f'GET {label}', cat='io'):
+        info = manifest.get(key) if manifest else _A
+        if info is _A:
+            return _telecharger_premier(urls, dest, label, log)
+        if "blocks" in info:
             try:
-                conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_dialog_ja ON "dialog"(ja);')
-            except Exception as ie:
-                log.warning(f"Index unique non créé pour dialog: {ie}")
-        
-        def upsert_dialog(conn, items):
-            sql = '''
-                INSERT INTO "dialog" (ja, en)
-                VALUES (?, ?)
-                ON CONFLICT(ja) DO UPDATE SET en = excluded.en;
-            '''
-            rows = [(str(ja).strip(), '' if fr is None else str(fr).strip())
-                    for (ja, fr) in items.items() if ja]
-            if rows:
-                conn.executemany(sql, rows)
-        def ensure_fixed_dialog_schema(conn):
-                conn.execute('\n            CREATE TABLE IF NOT EXISTS "fixed_dialog_template" (\n                id INTEGER PRIMARY KEY AUTOINCREMENT,\n                ja TEXT,\n                en TEXT,\n                bad_string INTEGER NOT NULL DEFAULT 0\n            );\n        ')
-                try:conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_fixed_dialog_template_ja ON "fixed_dialog_template"(ja);')
-                except Exception as ie:log.warning(f"Index unique non créé pour fixed_dialog_template: {ie}")
-        def upsert_rows(conn,table_name,items):
-                sql=f'\n            INSERT INTO "{table_name}" (ja, en)\n            VALUES (?, ?)\n            ON CONFLICT(ja) DO UPDATE SET en = excluded.en;\n        ';rows=[(str(ja).strip(),A if fr is _A else str(fr).strip())for(ja,fr)in items.items()if ja]
-                if rows:conn.executemany(sql,rows)
-        def upsert_fixed_dialog(conn,items):
-                sql='\n            INSERT INTO "fixed_dialog_template" (ja, en, bad_string)\n            VALUES (?, ?, 0)\n            ON CONFLICT(ja) DO UPDATE SET en = excluded.en, bad_string = 0;\n        ';rows=[(str(ja).strip(),A if fr is _A else str(fr).strip())for(ja,fr)in items.items()if ja]
-                if rows:conn.executemany(sql,rows)
-        def update_only_en_by_ja(conn,table_name,items):
-                cur=conn.cursor();updated=skipped=0
-                for(ja,fr)in items.items():
-                        if not ja:continue
-                        ja_s=str(ja).strip();fr_s=A if fr is _A else str(fr).strip()
-                        if not ja_s:continue
-                        cur.execute(f'UPDATE "{table_name}" SET en = ? WHERE ja = ?;',(fr_s,ja_s))
-                        if cur.rowcount==0:skipped+=1
-                        else:updated+=1
-                return updated,skipped
-        for file_name in json_files:
-                table=file_name.replace('.json',A);url=GITHUB_BASE+file_name
-                try:response=_download(url);data=json.loads(response.content.decode(_F))
-                except Exception as e:log.error(f"Échec du téléchargement ou parsing de {url} : {e}");continue
-                if isinstance(data,list):items={entry.get('ja',A):entry.get('fr',A)for entry in data if isinstance(entry,dict)}
-                elif isinstance(data,dict):items={str(k):A if v is _A else str(v)for(k,v)in data.items()}
-                else:log.error(f"Format JSON non supporté pour {file_name}");continue
-                try:
-                    with sqlite3.connect(db_path) as conn:
-                        conn.execute(C); conn.execute(D)
-                        t0 = time.time()
-                        if table == 'fixed_dialog_template':
-                            # Crée les deux schémas
-                            ensure_fixed_dialog_schema(conn)
-                            ensure_dialog_schema(conn)
-                        
-                            # Upsert dans fixed_dialog_template (avec bad_string)
-                            upsert_fixed_dialog(conn, items)
-                            log.info(f"✅ fixed_dialog_template: {len(items)} lignes upsert (bad_string=0)")
-                        
-                            # Upsert dans dialog (sans bad_string)
-                            upsert_dialog(conn, items)
-                            log.info(f"✅ dialog (dup from fixed_dialog_template): {len(items)} lignes upsert")
-                        
-                            conn.commit()
-                        elif table == 'm00_strings':
-                            ensure_table_schema(conn, table, unique_idx=_E)
-                            updated, skipped = update_only_en_by_ja(conn, table, items)
-                            conn.commit()
-                            log.info(f"✅ {table}: {updated} MAJ, {skipped} non trouvées (UPDATE-only) en {int((time.time()-t0)*1000)} ms.")
-                        else:
-                            ensure_table_schema(conn, table, unique_idx=_B)
-                            upsert_rows(conn, table, items)
-                            conn.commit()
-                            log.info(f"✅ {table}: {len(items)} lignes upsert en {int((time.time()-t0)*1000)} ms.")
-                except Exception as e:
-                    log.error(f"Erreur d'injection pour {table}: {e}")
-from os.path import join as pjoin
+                result = _patch_delta(urls[0], dest, info, manifest["block_size"], log)
+                if result:
+                    return result
+            except _Annulation:
+                raise
+            except Exception as e:
+                log.warning(f"Delta {label} impossible ({e}) ; téléchargement complet.")
+        elif os.path.isfile(dest) and os.path.getsize(dest) == info["size"] and _sha256_fichier(dest) == info["sha256"]:
+            return dest
+        return _telecharger_premier(urls, dest, label, log, sha256=info["sha256"])
 
-def telecharger_patch_fr(log):
-        F='w+b';E='installdirectory';D='config';C='data00000000.win32.dat0';B='Game/Content/Data'
-        if is_dqx_process_running(): log.exception('Veuillez fermer DQX avant de mettre à jour les fichiers DAT/IDX traduits.'); return
-        if not check_if_running_as_admin(): log.exception('Ce programme doit être exécuté en administrateur pour appliquer le patch FR DAT/IDX. Relancez-le en administrateur puis réessayez.'); return
-        config=UserConfig()
-        read_game_path=pjoin(config.game_path,B,C)
+
+def _verifier_patch_fr(log):
+        """
+        Vérifications du patch FR DAT/IDX à faire dans le thread principal, avant les étapes parallèles :
+        jeu fermé, droits administrateur et dossier du jeu (demandé par une fenêtre tkinter s'il est introuvable).
+        Renvoie True si le patch peut être téléchargé.
+        """
+        E='installdirectory';D='config';C='data00000000.win32.dat0';B='Game/Content/Data'
+        if is_dqx_process_running(): log.exception('Veuillez fermer DQX avant de mettre à jour les fichiers DAT/IDX traduits.'); return _H
+        if not check_if_running_as_admin(): log.exception('Ce programme doit être exécuté en administrateur pour appliquer le patch FR DAT/IDX. Relancez-le en administrateur puis réessayez.'); return _H
+        read_game_path=pjoin(reglages().installdirectory,B,C)
         if not os.path.exists(read_game_path):
+                # Seul ce cas écrit dans user_settings.ini : on passe alors par UserConfig.
+                config=UserConfig()
                 default_game_path='C:/Program Files (x86)/SquareEnix/DRAGON QUEST X'
                 if os.path.exists(default_game_path):
                         config.update(section=D,key=E,value=default_game_path)
                 else:
                         log.warning('Impossible de vérifier le dossier DRAGON QUEST X. Sélectionnez manuellement le dossier « DRAGON QUEST X » où le jeu est installé.')
+                        from tkinter.filedialog import askdirectory
                         while _B:
                                 dqx_path=askdirectory()
-                                if not dqx_path: log.error("Aucun dossier sélectionné (fenêtre fermée). Le programme va s'arrêter."); return
+                                if not dqx_path: log.error("Aucun dossier sélectionné (fenêtre fermée). Le programme va s'arrêter."); return _H
                                 dat0_path=pjoin(dqx_path,B,C)
                                 if os.path.isfile(dat0_path):
                                         config.update(section=D,key=E,value=dqx_path); log.success('Chemin DRAGON QUEST X vérifié.'); break
                                 else:
                                         log.warning('Chemin invalide. Sélectionnez le dossier « DRAGON QUEST X » où le jeu est installé.')
-        config.reinit()
-        dqx_path=pjoin(config.game_path,B)
-        if is_patchdaily_enabled():
+                _invalider_reglages()
+        return _G
+def _preparer_patch_fr(log):
+        'Télécharge le patch FR DAT/IDX à côté des fichiers du jeu (après _verifier_patch_fr) ; renvoie [(temporaire, cible)] à appliquer.'
+        settings=reglages()
+        dqx_path=pjoin(settings.installdirectory,'Game/Content/Data')
+        if settings.patchdaily:
                 fr_dat_urls=['https://github.com/Sato2Carte/JSONDQXFR/releases/download/sub/data00000000.win32.dat1']
                 fr_idx_urls=['https://github.com/Sato2Carte/JSONDQXFR/releases/download/sub/data00000000.win32.idx']
                 log.info('Téléchargement des fichiers FR (Patch quotidien (Instable))…')
@@ -283,23 +851,122 @@ def telecharger_patch_fr(log):
                 fr_dat_urls=['https://github.com/Sato2Carte/JSONDQXFR/releases/download/dat%2Fidx/data00000000.win32.dat1']
                 fr_idx_urls=['https://github.com/Sato2Carte/JSONDQXFR/releases/download/dat%2Fidx/data00000000.win32.idx']
                 log.info('Téléchargement des fichiers FR…')
-        dat_request,last_err=_A,_A
-        for url in fr_dat_urls:
-                try: dat_request=download_file(url); break
-                except Exception as e: last_err=e; log.warning(f"Échec depuis {url} ({e}); tentative suivante…")
-        if dat_request is _A: raise last_err or RuntimeError('Impossible de télécharger le fichier DAT1 FR.')
-        idx_request,last_err=_A,_A
-        for url in fr_idx_urls:
-                try: idx_request=download_file(url); break
-                except Exception as e: last_err=e; log.warning(f"Échec depuis {url} ({e}); tentative suivante…")
-        if idx_request is _A: raise last_err or RuntimeError('Impossible de télécharger le fichier IDX FR.')
-        with open(pjoin(dqx_path,'data00000000.win32.dat1'),F) as f: f.write(dat_request.content)
-        with open(pjoin(dqx_path,'data00000000.win32.idx'),F) as f: f.write(idx_request.content)
+        dat_path=pjoin(dqx_path,'data00000000.win32.dat1');idx_path=pjoin(dqx_path,'data00000000.win32.idx')
+        manifest=_lire_manifeste_blocs(fr_dat_urls[0])
+        # DAT et IDX en parallèle, chacun écrit dans un fichier temporaire à côté de la cible ;
+        # on ne remplace les fichiers du jeu qu'une fois les deux vérifiés.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+                dat_future=pool.submit(_obtenir_fichier,fr_dat_urls,dat_path,'DAT1',manifest,'dat',log)
+                idx_future=pool.submit(_obtenir_fichier,fr_idx_urls,idx_path,'IDX',manifest,'idx',log)
+                dat_part=dat_future.result();idx_part=idx_future.result()
+        return [(dat_part,dat_path),(idx_part,idx_path)]
+def _appliquer_patch_fr(log,parts):
+        'Remplace les fichiers du jeu par ceux préparés par _preparer_patch_fr.'
+        if parts is _A:return
+        if all(part==path for part,path in parts):log.success('Patch FR DAT/IDX déjà à jour.');return
+        for part,path in parts:
+                if part!=path:os.replace(part,path)
         log.success('Patch FR DAT/IDX appliqué avec succès.')
-def parse_arguments():A='store_true';parser=argparse.ArgumentParser(description='dqxclarity: A Japanese to English translation tool for Dragon Quest X.');parser.add_argument('-u','--disable-update-check',action=A,help='Disables checking for updates on each launch.');parser.add_argument('-c','--communication-window',action=A,help='Writes hooks into the game to translate the dialog window with a live translation service.');parser.add_argument('-p','--player-names',action=A,help='Scans for player names and changes them to their Romaji counterpart.');parser.add_argument('-n','--npc-names',action=A,help='Scans for NPC names and changes them to their Romaji counterpart.');parser.add_argument('-l','--community-logging',action=A,help='Enables dumping important game information that the dqxclarity devs need to continue this project.');parser.add_argument('-d','--update-dat',action=A,help='Update the translated idx and dat file with the latest from Github. Requires the game to be closed.');return parser.parse_args()
+def telecharger_patch_fr(log):
+        if _verifier_patch_fr(log):_appliquer_patch_fr(log,_preparer_patch_fr(log))
+class _JournalEtape:
+    """
+    Journal d'une étape du lancement : les messages sont gardés pendant l'exécution (parallèle)
+    puis réémis d'un bloc, dans l'ordre des étapes, pour un console.log lisible et reproductible.
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    def __getattr__(self, level):
+        def _log(msg, *args, **kwargs):
+            if level == 'exception':
+                self.messages.append(('error', f"{msg}\n{traceback.format_exc().rstrip()}", args, kwargs))
+            else:
+                self.messages.append((level, msg, args, kwargs))
+        return _log
+
+    def rejouer(self, log):
+        for level, msg, args, kwargs in self.messages:
+            getattr(log, level)(msg, *args, **kwargs)
+        self.messages = []
+
+
+class _EtapeIgnoree(Exception):
+    pass
+
+
+def _executer_etapes(etapes, log):
+    """
+    Exécute les étapes du lancement en parallèle, chacune dès que ses dépendances sont terminées.
+    etapes : [(nom, dépendances, fonction)] dans l'ordre du lancement séquentiel ; la fonction reçoit
+    le journal de l'étape puis les résultats de ses dépendances. Les journaux sont réémis dans cet ordre.
+    Une étape dont une dépendance a échoué n'est pas exécutée. Une étape qui demande l'arrêt par
+    sys.exit (comme la mise à jour en place) lève _ARRET : une étape dont les dépendances se terminent
+    ensuite ne démarre pas, et les téléchargements en cours s'interrompent au bloc suivant. Après la fin des étapes en cours,
+    SystemExit puis la première erreur sont relancés dans le thread principal. Renvoie {nom: résultat}.
+    """
+    journaux = {name: _JournalEtape() for name, _, _ in etapes}
+    futures = {}
+    _ARRET.clear()
+
+    def _run(name, deps, fn):
+        args = []
+        for dep in deps:
+            try:
+                args.append(futures[dep].result())
+            except BaseException as e:
+                raise _EtapeIgnoree(dep) from e
+        _verifier_arret()
+        with PROFILE.phase(name):
+            try:
+                return fn(journaux[name], *args)
+            except SystemExit:
+                _ARRET.set()
+                raise
+
+    results, stop, error = {}, _A, _A
+    # Toutes les étapes sont soumises d'emblée (une par thread) : celles qui attendent une dépendance
+    # sont déjà en cours, c'est _verifier_arret qui les empêche de démarrer.
+    with ThreadPoolExecutor(max_workers=max(len(etapes), 1)) as pool:
+        for name, deps, fn in etapes:
+            assert all(dep in futures for dep in deps), f"{name} : dépendance déclarée après l'étape"
+            futures[name] = pool.submit(_run, name, deps, fn)
+        for name, _, _ in etapes:
+            try:
+                results[name] = futures[name].result()
+            except SystemExit as e:
+                stop = e
+            except _EtapeIgnoree as e:
+                if not isinstance(e.__cause__, (SystemExit, _EtapeIgnoree, _Annulation)):
+                    journaux[name].warning(f"Étape {name} ignorée : {e} a échoué.")
+            except _Annulation:
+                journaux[name].info(f"Étape {name} interrompue.")
+            except Exception as e:
+                journaux[name].error(f"Étape {name} en échec : {e}")
+                error = error or e
+            journaux[name].rejouer(log)
+    if stop is not _A:
+        raise stop
+    if error is not _A:
+        raise error
+    return results
+
+
+def parse_arguments():A='store_true';parser=argparse.ArgumentParser(description='dqxclarity: A Japanese to English translation tool for Dragon Quest X.');parser.add_argument('-u','--disable-update-check',action=A,help='Disables checking for updates on each launch.');parser.add_argument('-c','--communication-window',action=A,help='Writes hooks into the game to translate the dialog window with a live translation service.');parser.add_argument('-p','--player-names',action=A,help='Scans for player names and changes them to their Romaji counterpart.');parser.add_argument('-n','--npc-names',action=A,help='Scans for NPC names and changes them to their Romaji counterpart.');parser.add_argument('-l','--community-logging',action=A,help='Enables dumping important game information that the dqxclarity devs need to continue this project.');parser.add_argument('-d','--update-dat',action=A,help='Update the translated idx and dat file with the latest from Github. Requires the game to be closed.');parser.add_argument('--profile-startup',action=A,help='Times each startup step and writes a Chrome trace (JSON) to the logs folder.');parser.add_argument('--mirror',metavar='URL',help='Downloads files from a local mirror (see local_server.py) instead of GitHub.');return parser.parse_args()
+def _ecrire_profil(log,logs_dir):
+        'Écrit la trace du lancement dans logs/ et en affiche le résumé (--profile-startup).'
+        if not PROFILE.enabled:return
+        path=PROFILE.write(logs_dir)
+        for line in PROFILE.summary():log.info(line)
+        log.info(f"Profil du lancement écrit dans {path}")
 def main():
         A = 'Updating custom text in db.'
         args = parse_arguments()
+        if args.mirror:
+            os.environ[MIRROR_ENV] = args.mirror
+        if args.profile_startup:
+            PROFILE.enable()
         logs_dir = Path(get_project_root('logs'))
         logs_dir.mkdir(parents=_B, exist_ok=_B)
         log_path = get_project_root('logs/console.log')
@@ -307,42 +974,71 @@ def main():
         log = setup_logging()
         log.info('Running. Please wait until this window says "Done!" before logging into your character.')
         log.debug('Ensuring db structure.')
-        create_db_schema()
+        with PROFILE.phase('create_db_schema'):
+            create_db_schema()
         log.debug('Checking user_settings.ini.')
-        UserConfig(warnings=_B)
+        with PROFILE.phase('UserConfig'):
+            UserConfig(warnings=_B)
 
-        fr_enabled = is_fr_launcher(_D)
-        daily_enabled = is_patchdaily_enabled(_D)
-        serverside_fr = is_serversidefr_enabled(_D)
+        with PROFILE.phase('user_settings.ini'):
+            settings = reglages(_D)
+        fr_enabled = settings.fr
+        daily_enabled = settings.patchdaily
+        serverside_fr = settings.serversidefr
 
+        # Étapes du lancement, dans l'ordre historique : seuls les téléchargements se chevauchent. Tout ce
+        # qui écrit (jeu, DB) attend la vérification de mise à jour de dqxclarity, et les écritures dans
+        # clarity_dialogFR.db gardent l'ordre séquentiel (download_custom_files, import SST, corrections
+        # manuelles, import_name_overrides) : chacune écrase les tables de la précédente.
+        etapes = []
         if args.update_dat:
-            log.info('Updating DAT mod.')
-            download_dat_files()
-
+            def _dat_mod(j):
+                j.info('Updating DAT mod.')
+                download_dat_files()
+            etapes.append(('download_dat_files', (), _dat_mod))
         if not args.disable_update_check:
             log.info(A)
-            check_and_update_clarity_inplace(update=_G, log=log)
-            if daily_enabled or fr_enabled:
-                telecharger_patch_fr(log)
-            download_custom_files()
+            clarity = 'check_and_update_clarity_inplace'
+            etapes.append((clarity, (), lambda j: check_and_update_clarity_inplace(update=_G, log=j)))
+            # La fenêtre de choix du dossier du jeu (tkinter) et son explication restent dans le thread principal.
+            if (daily_enabled or fr_enabled) and _verifier_patch_fr(log):
+                # Le delta du DAT FR se calcule sur le DAT installé : après le DAT mod s'il est demandé.
+                etapes.append(('patch_fr:fetch', ('download_dat_files',) if args.update_dat else (), lambda j, *_: _preparer_patch_fr(j)))
+                etapes.append(('patch_fr:apply', ('patch_fr:fetch', clarity), lambda j, parts, _: _appliquer_patch_fr(j, parts)))
+            etapes.append(('download_custom_files', (clarity,), lambda j, _: download_custom_files()))
             if serverside_fr:
-                mettre_a_jour_db_fr(log)
-                db_manuelle(log)
-        import_name_overrides()
+                etapes.append(('sst:fetch', (), _recuperer_sst))
+                etapes.append(('sst:ingest', ('sst:fetch', clarity, 'download_custom_files'), lambda j, staged, *_: _ingerer_sst(j, staged)))
+                etapes.append(('db_manuelle', ('sst:ingest',), lambda j, _: db_manuelle(j)))
+        if args.disable_update_check:
+            overrides_deps = ()
+        elif serverside_fr:
+            overrides_deps = ('db_manuelle',)
+        else:
+            overrides_deps = ('download_custom_files',)
+        etapes.append(('import_name_overrides', overrides_deps, lambda j, *_: import_name_overrides()))
+        _executer_etapes(etapes, log)
+        _ecrire_profil(log, logs_dir)
+        # Les options de diagnostic ne lancent rien à elles seules.
+        options = {k: v for k, v in vars(args).items() if k not in ('profile_startup', 'mirror')}
         try:
-            if not any(vars(args).values()):
+            if not any(options.values()):
                 log.success('No options were selected. dqxclarity will exit.')
                 time.sleep(3)
                 sys.exit(0)
             wait_for_dqx_to_launch()
             if args.player_names or args.communication_window:
+                from hooking.hook import activate_hooks
                 start_process(name='Hook loader', target=activate_hooks, args=(args.player_names, args.communication_window))
             if args.communication_window:
+                from scans.walkthrough import loop_scan_for_walkthrough
                 start_process(name='Walkthrough scanner', target=loop_scan_for_walkthrough, args=())
             if args.community_logging:
                 log.warning('Logs can be found in the "logs" folder. You should only enable this flag if you were asked to by the dqxclarity team. This feature is unstable. You will not receive help if you\'ve enabled this on your own. Once you\'re done logging, you will need to manually close the dqxclarity window.')
+                from dqxcrypt.dqxcrypt import start_logger
                 start_process(name='Community logging', target=start_logger, args=())
             if args.player_names or args.npc_names:
+                from scans.manager import run_scans
                 start_process(name='Name scanner', target=run_scans, args=(args.player_names, args.npc_names))
             log.success('Done! Keep this window open (minimize it) and have fun on your adventure!')
         except Exception:
@@ -0,0 +1,119 @@
+"""
+Instrumentation du lancement (main.py --profile-startup) et redirection des téléchargements vers un miroir.
+
+    python main.py --profile-startup [--mirror http://127.0.0.1:8000/]
+
+Chaque étape du lancement est chronométrée (PROFILE.phase), avec les octets téléchargés et les
+lignes écrites en base qui lui reviennent (PROFILE.add). Le résultat est écrit dans
+logs/startup-AAAAMMJJ-HHMMSS.json au format Chrome trace (chrome://tracing ou ui.perfetto.dev) ;
+la section otherData contient les totaux et la liste des URL téléchargées.
+
+Miroir : si DQXFR_MIRROR vaut une URL de base, https://hôte/chemin est téléchargé depuis
+<miroir>/hôte/chemin. Avec local_server.py (dont --fetch-from remplit le dossier servi à partir
+des URL d'une trace), le lancement se rejoue hors ligne, à données constantes.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import json
+import os
+import threading
+import time
+
+MIRROR_ENV = "DQXFR_MIRROR"
+
+
+def mirror_url(url: str) -> str:
+    """URL à utiliser pour url : inchangée, ou réécrite vers le miroir DQXFR_MIRROR s'il est défini."""
+    base = os.environ.get(MIRROR_ENV)
+    if not base:
+        return url
+    parts = urlsplit(url)
+    return f"{base.rstrip('/')}/{parts.netloc}{parts.path}"
+
+
+class StartupProfile:
+    """Chronométrage des étapes du lancement ; ne coûte rien tant qu'il n'est pas activé."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.totals = Counter()
+        self.urls = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._t0 = time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+        self._t0 = time.perf_counter_ns()
+
+    @contextmanager
+    def phase(self, name: str, cat: str = "startup", **args):
+        """
+        Chronomètre le bloc ; les compteurs ajoutés pendant le bloc (même thread) lui sont attribués.
+        Seules les étapes de catégorie "startup" figurent dans le résumé, les autres (détail) dans la trace.
+        """
+        if not self.enabled:
+            yield
+            return
+        stack = self._local.__dict__.setdefault("stack", [])
+        counters = Counter()
+        stack.append(counters)
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end = time.perf_counter_ns()
+            stack.pop()
+            if stack:
+                stack[-1].update(counters)
+            with self._lock:
+                self.events.append({
+                    "name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                    "ts": (start - self._t0) / 1000, "dur": (end - start) / 1000, "args": dict(args, **counters),
+                })
+
+    def add(self, counter: str, n: int):
+        """Ajoute n au compteur (bytes_downloaded, rows_written, ...) et à l'étape en cours."""
+        if not self.enabled or not n:
+            return
+        with self._lock:
+            self.totals[counter] += n
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            stack[-1][counter] += n
+
+    def url(self, url: str):
+        if self.enabled:
+            with self._lock:
+                if url not in self.urls:
+                    self.urls.append(url)
+
+    def summary(self) -> list:
+        """Lignes de résumé : début et durée des étapes du lancement, par ordre de début."""
+        lines = []
+        for event in sorted(self.events, key=lambda e: e["ts"]):
+            if event["cat"] == "startup":
+                extra = "".join(f", {k}={v}" for k, v in event["args"].items())
+                lines.append(f"{event['ts'] / 1000:9.1f} ms +{event['dur'] / 1000:9.1f} ms  {event['name']}{extra}")
+        lines.append(f"{(time.perf_counter_ns() - self._t0) / 1e6:9.1f} ms              total"
+                     + "".join(f", {k}={v}" for k, v in sorted(self.totals.items())))
+        return lines
+
+    def write(self, logs_dir) -> Path:
+        """Écrit la trace dans logs_dir et renvoie son chemin."""
+        path = Path(logs_dir) / time.strftime("startup-%Y%m%d-%H%M%S.json")
+        with self._lock:
+            trace = {
+                "traceEvents": sorted(self.events, key=lambda e: e["ts"]),
+                "displayTimeUnit": "ms",
+                "otherData": {"totals": dict(self.totals), "urls": self.urls, "mirror": os.environ.get(MIRROR_ENV)},
+            }
+        path.write_text(json.dumps(trace, ensure_ascii=False, indent=1), encoding="utf-8")
+        return path
+
+
+PROFILE = StartupProfile()
@@ -0,0 +1,370 @@
+"""
+Compile le corpus Json/ en un magasin binaire indexé, lu par mmap sans désérialisation.
+
+    python string_store.py build [--jobs N] [--no-cache] [--verify]
+    python string_store.py get eventTextCsA11Client 14678
+    python string_store.py find "武器なし" [--file subPackage05Client]
+    python string_store.py stats
+
+Format (entiers little-endian, offsets absolus dans le fichier) :
+
+    en-tête     MAGIC, nombre de fichiers, offset de la table des fichiers,
+                offset et taille de la table des chaînes
+    fichiers    une fiche par fichier source, triées par nom : nom, entrées, index ja
+    entrées     par fichier, triées par id : (id, ja_off, ja_len, fr_off, fr_len)
+    index ja    par fichier, table de hachage à adressage ouvert (puissance de 2) :
+                (étiquette 32 bits, numéro d'entrée + 1), 0 = case vide
+    chaînes     UTF-8 dédupliqué ; un texte présent N fois n'est stocké qu'une fois
+
+La construction est découpée par fichier : chaque fichier source est encodé indépendamment
+(entrées triées, chaînes locales, index ja) dans un pool de processus, puis les morceaux sont
+assemblés dans l'ordre des fichiers en reportant les chaînes dans la table commune. Les morceaux
+sont gardés dans build/store_cache/, par empreinte du fichier source : après quelques retouches,
+seuls les fichiers modifiés sont réencodés. Le résultat est identique octet pour octet à la
+construction en un seul passage (build_serial), ce que vérifient tests/test_string_store.py et
+build --verify.
+
+Le DAT/IDX FR publié (data00000000.win32.dat1/.idx) n'est pas construit ici : le dépôt n'a pas
+d'encodeur pour ce format, et sa construction par morceaux reste à faire.
+"""
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import hashlib
+import mmap
+import pickle
+import random
+import struct
+import sys
+import tempfile
+import time
+
+from corpus import CORPUS_DIR, corpus_files, file_sha256, iter_entries
+
+MAGIC = b"DQXSTR1\0"
+HEADER = struct.Struct("<8sIIII")
+FILE_REC = struct.Struct("<IIIIII")
+ENTRY = struct.Struct("<IIIII")
+SLOT = struct.Struct("<II")
+DEFAULT_OUTPUT = Path(__file__).parent / "build" / "json_store.bin"
+CACHE_DIR = Path(__file__).parent / "build" / "store_cache"
+SHARD_VERSION = 1
+
+
+def _hash(text: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(text, digest_size=8).digest(), "little")
+
+
+def _slot_count(n: int) -> int:
+    size = 8
+    while size < 2 * n:
+        size <<= 1
+    return size
+
+
+class _StringTable:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text: str) -> tuple:
+        return self.add_bytes(text.encode("utf-8"))
+
+    def add_bytes(self, raw: bytes) -> tuple:
+        off = self.offsets.get(raw)
+        if off is None:
+            off = self.offsets[raw] = len(self.data)
+            self.data += raw
+        return off, len(raw)
+
+    def add_all(self, raws: list) -> list:
+        """add_bytes pour chaque chaîne, dans l'ordre (boucle locale : c'est le cœur de l'assemblage)."""
+        offsets, data, result = self.offsets, self.data, []
+        for raw in raws:
+            off = offsets.get(raw)
+            if off is None:
+                off = offsets[raw] = len(data)
+                data += raw
+            result.append((off, len(raw)))
+        return result
+
+
+def _index_table(jas: list) -> bytes:
+    """Index ja d'un fichier : (étiquette, numéro d'entrée + 1) par adressage ouvert."""
+    slots = [(0, 0)] * _slot_count(len(jas))
+    mask = len(slots) - 1
+    for index, ja in enumerate(jas):
+        h = _hash(ja)
+        slot = h & mask
+        while slots[slot][1]:
+            slot = (slot + 1) & mask
+        slots[slot] = (h >> 32, index + 1)
+    return b"".join(SLOT.pack(*s) for s in slots)
+
+
+def _write(output: Path, sections: list, strings: _StringTable) -> dict:
+    """Écrit le magasin ; sections : [(nom, octets des entrées, octets de l'index, nb entrées)]."""
+    name_offsets = [strings.add(name) for name, *_ in sections]
+    files_offset = HEADER.size
+    cursor = files_offset + FILE_REC.size * len(sections)
+    file_table = bytearray()
+    body = bytearray()
+    for (name, records, table, count), (name_off, name_len) in zip(sections, name_offsets):
+        file_table += FILE_REC.pack(name_off, name_len, cursor + len(body), count, cursor + len(body) + len(records), len(table) // SLOT.size)
+        body += records + table
+    strings_offset = cursor + len(body)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp = output.with_name(output.name + ".part")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(sections), files_offset, strings_offset, len(strings.data)))
+        f.write(file_table)
+        f.write(body)
+        f.write(strings.data)
+    tmp.replace(output)
+    return {"files": len(sections), "entries": sum(s[3] for s in sections), "strings": len(strings.data), "size": output.stat().st_size}
+
+
+def build_serial(json_dir: Path = CORPUS_DIR, output: Path = DEFAULT_OUTPUT) -> dict:
+    """Construction de référence, en un seul passage sur tous les fichiers."""
+    strings = _StringTable()
+    sections = []
+    for path in corpus_files(json_dir):
+        entries = sorted((int(key), ja, fr) for key, ja, fr in iter_entries(path))
+        records = bytearray()
+        for key, ja, fr in entries:
+            records += ENTRY.pack(key, *strings.add(ja), *strings.add(fr))
+        table = _index_table([ja.encode("utf-8") for _, ja, _ in entries])
+        sections.append((path.stem, bytes(records), table, len(entries)))
+    return _write(output, sections, strings)
+
+
+def encode_file(path: str) -> tuple:
+    """
+    Morceau d'un fichier, indépendant des autres (exécuté dans un processus du pool) :
+    (nom, chaînes locales [octets, dans l'ordre de première apparition], entrées [(id, n° ja, n° fr)], index ja).
+    """
+    path = Path(path)
+    entries = sorted((int(key), ja, fr) for key, ja, fr in iter_entries(path))
+    local, numbers, refs = [], {}, []
+    for key, ja, fr in entries:
+        pair = [key]
+        for text in (ja, fr):
+            raw = text.encode("utf-8")
+            number = numbers.get(raw)
+            if number is None:
+                number = numbers[raw] = len(local)
+                local.append(raw)
+            pair.append(number)
+        refs.append(tuple(pair))
+    return path.stem, local, refs, _index_table([local[ja] for _, ja, _ in refs])
+
+
+def _load_shards(paths: list, jobs: int, cache_dir: Path) -> tuple:
+    """Morceaux de tous les fichiers, pris dans le cache quand l'empreinte du fichier n'a pas changé."""
+    shards, todo = {}, []
+    digests = {path: file_sha256(path) for path in paths}
+    for path in paths:
+        cached = cache_dir / (path.stem + ".pickle") if cache_dir else None
+        if cached and cached.exists():
+            with open(cached, "rb") as f:
+                version, sha256, shard = pickle.load(f)
+            if (version, sha256) == (SHARD_VERSION, digests[path]):
+                shards[path] = shard
+                continue
+        todo.append(path)
+    if len(todo) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            encoded = list(pool.map(encode_file, map(str, todo), chunksize=8))
+    else:
+        encoded = [encode_file(str(path)) for path in todo]
+    for path, shard in zip(todo, encoded):
+        shards[path] = shard
+        if cache_dir:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = cache_dir / (path.stem + ".pickle.part")
+            with open(tmp, "wb") as f:
+                pickle.dump((SHARD_VERSION, digests[path], shard), f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(cache_dir / (path.stem + ".pickle"))
+    if cache_dir and cache_dir.exists():
+        names = {path.stem + ".pickle" for path in paths}
+        for stale in cache_dir.glob("*.pickle"):
+            if stale.name not in names:
+                stale.unlink()
+    return [shards[path] for path in paths], len(todo)
+
+
+def build(json_dir: Path = CORPUS_DIR, output: Path = DEFAULT_OUTPUT, jobs: int = None, cache_dir: Path = CACHE_DIR) -> dict:
+    """
+    Compile tous les fichiers de json_dir dans output (morceaux encodés en parallèle, cache par
+    empreinte, cache_dir=None pour tout réencoder) ; renvoie quelques statistiques.
+    """
+    shards, encoded = _load_shards(corpus_files(json_dir), jobs, cache_dir)
+    strings = _StringTable()
+    sections = []
+    for name, local, refs, table in shards:
+        # Les chaînes locales sont reportées dans l'ordre de leur première apparition dans le fichier,
+        # soit l'ordre dans lequel build_serial les ajoute : les offsets sont les mêmes.
+        offsets = strings.add_all(local)
+        records = b"".join(ENTRY.pack(key, *offsets[ja], *offsets[fr]) for key, ja, fr in refs)
+        sections.append((name, records, table, len(refs)))
+    return dict(_write(output, sections, strings), encoded=encoded)
+
+
+class StringStore:
+    """Lecture du magasin par mmap : recherche par (fichier, id) ou par texte japonais."""
+
+    def __init__(self, path: Path = DEFAULT_OUTPUT):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, files_offset, self._strings, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} n'est pas un magasin de chaînes ({magic!r})")
+        self._files = {}
+        for i in range(count):
+            name_off, name_len, *rest = FILE_REC.unpack_from(self._mm, files_offset + i * FILE_REC.size)
+            self._files[self._text(name_off, name_len)] = rest
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _text(self, off: int, length: int) -> str:
+        start = self._strings + off
+        return self._mm[start:start + length].decode("utf-8")
+
+    def _entry(self, entries_off: int, index: int) -> tuple:
+        key, ja_off, ja_len, fr_off, fr_len = ENTRY.unpack_from(self._mm, entries_off + index * ENTRY.size)
+        return key, self._text(ja_off, ja_len), self._text(fr_off, fr_len)
+
+    def files(self) -> list:
+        return list(self._files)
+
+    def __len__(self):
+        return sum(rec[1] for rec in self._files.values())
+
+    def get(self, file: str, key) -> tuple:
+        """(ja, fr) de l'entrée id du fichier, ou None. Recherche dichotomique dans les ids triés."""
+        rec = self._files.get(file)
+        if rec is None:
+            return None
+        entries_off, count, _, _ = rec
+        key = int(key)
+        ids = _IdView(self._mm, entries_off, count)
+        index = bisect_left(ids, key)
+        if index < count and ids[index] == key:
+            return self._entry(entries_off, index)[1:]
+        return None
+
+    def lookup(self, file: str, ja: str) -> list:
+        """[(id, fr)] des entrées du fichier dont le texte japonais est exactement ja."""
+        rec = self._files.get(file)
+        if rec is None:
+            return []
+        entries_off, _, hash_off, slot_count = rec
+        raw = ja.encode("utf-8")
+        h = _hash(raw)
+        tag, mask = h >> 32, slot_count - 1
+        slot = h & mask
+        found = []
+        while True:
+            slot_tag, index = SLOT.unpack_from(self._mm, hash_off + slot * SLOT.size)
+            if not index:
+                return found
+            if slot_tag == tag:
+                key, entry_ja, fr = self._entry(entries_off, index - 1)
+                if entry_ja == ja:
+                    found.append((key, fr))
+            slot = (slot + 1) & mask
+
+    def find(self, ja: str) -> list:
+        """[(fichier, id, fr)] de toutes les entrées du corpus dont le texte japonais est exactement ja."""
+        return [(file, key, fr) for file in self._files for key, fr in self.lookup(file, ja)]
+
+
+class _IdView:
+    """Séquence des ids d'un fichier lue directement dans le mmap (pour bisect)."""
+
+    def __init__(self, mm, entries_off: int, count: int):
+        self._mm, self._off, self._count = mm, entries_off, count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return struct.unpack_from("<I", self._mm, self._off + index * ENTRY.size)[0]
+
+
+def _stats(path: Path):
+    with StringStore(path) as store:
+        print(f"{path} : {path.stat().st_size / 1e6:.1f} Mo, {len(store.files())} fichiers, {len(store)} entrées")
+        rng = random.Random(0)
+        samples = []
+        for file in rng.sample(store.files(), min(50, len(store.files()))):
+            entries_off, count, _, _ = store._files[file]
+            if count:
+                samples += [(file, store._entry(entries_off, rng.randrange(count))) for _ in range(20)]
+        t0 = time.perf_counter()
+        for file, (key, _, _) in samples:
+            store.get(file, key)
+        t1 = time.perf_counter()
+        for file, (_, ja, _) in samples:
+            store.lookup(file, ja)
+        t2 = time.perf_counter()
+        print(f"get(fichier, id) : {(t1 - t0) / len(samples) * 1e6:.1f} µs ; lookup(fichier, ja) : {(t2 - t1) / len(samples) * 1e6:.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Magasin binaire indexé des chaînes du corpus Json/.")
+    parser.add_argument("--store", type=Path, default=DEFAULT_OUTPUT, help=f"fichier magasin (défaut : {DEFAULT_OUTPUT})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="compile Json/ dans le magasin")
+    build_cmd.add_argument("--json-dir", type=Path, default=CORPUS_DIR)
+    build_cmd.add_argument("--jobs", type=int, help="processus d'encodage (défaut : un par cœur)")
+    build_cmd.add_argument("--no-cache", action="store_true", help="réencode tous les fichiers sans lire ni écrire build/store_cache/")
+    build_cmd.add_argument("--verify", action="store_true", help="compare le résultat à une construction en un seul passage")
+    get_cmd = sub.add_parser("get", help="texte d'une entrée (fichier, id)")
+    get_cmd.add_argument("file")
+    get_cmd.add_argument("id", type=int)
+    find_cmd = sub.add_parser("find", help="entrées dont le texte japonais est exactement celui donné")
+    find_cmd.add_argument("ja")
+    find_cmd.add_argument("--file")
+    sub.add_parser("stats", help="taille du magasin et latence des recherches")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        stats = build(args.json_dir, args.store, args.jobs, None if args.no_cache else CACHE_DIR)
+        print(f"{args.store} : {stats['files']} fichiers ({stats['encoded']} réencodés), {stats['entries']} entrées, "
+              f"{stats['size'] / 1e6:.1f} Mo en {time.perf_counter() - t0:.1f} s")
+        if args.verify:
+            with tempfile.TemporaryDirectory() as tmp:
+                reference = Path(tmp) / "serial.bin"
+                build_serial(args.json_dir, reference)
+                if reference.read_bytes() != args.store.read_bytes():
+                    sys.exit("Différent de la construction en un seul passage.")
+            print("Identique à la construction en un seul passage.")
+    elif args.command == "stats":
+        _stats(args.store)
+    else:
+        with StringStore(args.store) as store:
+            if args.command == "get":
+                result = store.get(args.file, args.id)
+                if result is None:
+                    sys.exit(f"Entrée {args.id} introuvable dans {args.file}.")
+                print(f"{result[0]}\n-> {result[1]}")
+            else:
+                results = store.lookup(args.file, args.ja) if args.file else store.find(args.ja)
+                for row in results:
+                    print(*((args.file,) + row if args.file else row), sep="\t")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+main.py est copié seul dans une installation de dqxclarity : les modules locaux qu'il importe et les
+fichiers qu'il lit doivent figurer dans FICHIERS_FR, que la mise à jour en place conserve.
+"""
+from pathlib import Path
+
+import ast
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _fichiers_fr(tree):
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "FICHIERS_FR" for t in node.targets):
+            return set(ast.literal_eval(node.value))
+    raise AssertionError("FICHIERS_FR absent de main.py")
+
+
+def test_fichiers_fr_couvrent_les_imports_locaux():
+    tree = ast.parse((ROOT / "main.py").read_text(encoding="utf-8"))
+    shipped = _fichiers_fr(tree)
+    local = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        local |= {f"{name.split('.')[0]}.py" for name in names if (ROOT / f"{name.split('.')[0]}.py").exists()}
+    assert local <= shipped, local - shipped
+    assert all((ROOT / name).exists() for name in shipped)
+    assert "db_overrides.json" in shipped
+    updater = (ROOT / "updater.py").read_text(encoding="utf-8")
+    assert all(f'"{name}"' in updater for name in shipped)
@@ -0,0 +1,62 @@
+"""build() (morceaux en parallèle, cache) doit produire le même fichier, octet pour octet, que build_serial()."""
+import json
+
+import pytest
+
+from string_store import StringStore, build, build_serial
+
+
+def _write_corpus(root, files):
+    root.mkdir(exist_ok=True)
+    for name, entries in files.items():
+        data = {key: {ja: fr} for key, ja, fr in entries}
+        (root / f"{name}.json").write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+
+CORPUS = {
+    # Chaînes partagées entre fichiers, ja en double, fr vide ou null, ids non triés.
+    "eventTextCsA11Client": [("14679", "「時を超える", "Le temps"), ("14678", "「キヒヒヒ！", "Ki hi hi !"), ("14700", "はい", None)],
+    "subPackage05Client": [("3", "はい", "Oui"), ("1", "いいえ", ""), ("2", "はい", "Oui")],
+    "items": [(str(i), f"アイテム{i % 7}", f"Objet {i % 5}") for i in range(50, 0, -1)],
+    "empty": [],
+}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    _write_corpus(tmp_path / "Json", CORPUS)
+    return tmp_path
+
+
+def _same(corpus, **kwargs):
+    stats = build(corpus / "Json", corpus / "sharded.bin", **kwargs)
+    build_serial(corpus / "Json", corpus / "serial.bin")
+    assert (corpus / "sharded.bin").read_bytes() == (corpus / "serial.bin").read_bytes()
+    return stats
+
+
+def test_parallel_build_matches_serial(corpus):
+    stats = _same(corpus, jobs=2, cache_dir=corpus / "cache")
+    assert stats["encoded"] == len(CORPUS)
+
+
+def test_cached_build_matches_serial_after_edits(corpus):
+    cache = corpus / "cache"
+    _same(corpus, jobs=2, cache_dir=cache)
+    assert _same(corpus, jobs=2, cache_dir=cache)["encoded"] == 0
+
+    edited = dict(CORPUS, subPackage05Client=[("3", "はい", "Oui !"), ("4", "新しい", "Nouveau")])
+    _write_corpus(corpus / "Json", edited)
+    assert _same(corpus, jobs=2, cache_dir=cache)["encoded"] == 1
+
+    (corpus / "Json" / "items.json").unlink()
+    assert _same(corpus, jobs=2, cache_dir=cache)["encoded"] == 0
+    assert not (cache / "items.pickle").exists()
+
+
+def test_store_lookups(corpus):
+    build(corpus / "Json", corpus / "store.bin", jobs=2, cache_dir=None)
+    with StringStore(corpus / "store.bin") as store:
+        assert store.get("eventTextCsA11Client", 14678) == ("「キヒヒヒ！", "Ki hi hi !")
+        assert store.get("eventTextCsA11Client", 14700) == ("はい", "")
+        assert sorted(store.lookup("subPackage05Client", "はい")) == [(2, "Oui"), (3, "Oui")]
@@ -0,0 +1,272 @@
+"""
+Mémoire de traduction construite à partir de Json/ (et, en option, des tables de clarity_dialogFR.db).
+
+    python translation_memory.py build [--db misc_files/clarity_dialogFR.db]
+    python translation_memory.py query "「君は　ドラゴラム中の竜の姿に" [-k 5]
+    python translation_memory.py prefill [--write] [--min-score 1.0] [fichiers...]
+
+L'index est persistant (build/tm.db, SQLite) et mis à jour de façon incrémentale : seules les
+sources (fichier JSON ou table) dont l'empreinte a changé sont réindexées.
+
+- correspondance exacte : sur le japonais normalisé NFKC (comme _norm_nfkc dans main.py) ;
+- correspondance floue : MinHash (une permutation, NUM_PERM cases) des bigrammes de caractères,
+  balises et espaces retirés, découpé en bandes LSH indexées ; les candidats sont reclassés
+  par indice de Jaccard exact.
+"""
+from collections import Counter
+from pathlib import Path
+
+import argparse
+import hashlib
+import re
+import sqlite3
+import time
+import unicodedata
+import zlib
+
+from corpus import CORPUS_DIR, corpus_files, file_sha256, iter_entries, load_entries, rewrite_translations
+
+DEFAULT_INDEX = Path(__file__).parent / "build" / "tm.db"
+DB_TABLES = ["m00_strings", "fixed_dialog_template", "dialog", "quests", "story_so_far_template", "walkthrough", "glossary"]
+NUM_PERM = 16
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+MAX_BUCKET = 200
+_EMPTY = (1 << 28) - 1
+_EMPTY_KEY = (_EMPTY << 28) | _EMPTY
+_NOISE = re.compile(r"<[^<>]*>|\s")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, sha256 TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, norm TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS segments (
+    source TEXT NOT NULL,
+    key TEXT NOT NULL,
+    text_id INTEGER NOT NULL,
+    fr TEXT NOT NULL,
+    PRIMARY KEY (source, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_segments_text ON segments(text_id);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    h INTEGER NOT NULL,
+    text_id INTEGER NOT NULL,
+    PRIMARY KEY (band, h, text_id)
+) WITHOUT ROWID;
+"""
+
+
+def normalize(ja: str) -> str:
+    return unicodedata.normalize("NFKC", ja or "").strip()
+
+
+def shingles(norm: str) -> set:
+    """Bigrammes de caractères du texte sans balises ni espaces."""
+    text = _NOISE.sub("", norm)
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def band_keys(grams: set) -> list:
+    """
+    Clés LSH [(bande, clé)] d'une signature MinHash à une seule permutation : chaque bigramme est
+    haché une fois, les 4 bits de poids faible choisissent la case, le minimum du reste y est gardé.
+    Les bandes dont les deux cases sont vides (textes courts) sont omises : communes à tous ces
+    textes, elles ne distinguent rien.
+    """
+    if not grams:
+        return []
+    signature = [_EMPTY] * NUM_PERM
+    for gram in grams:
+        h = (zlib.crc32(gram.encode("utf-8")) * 0x9E3779B1) & 0xFFFFFFFF
+        slot, value = h % NUM_PERM, h // NUM_PERM
+        if value < signature[slot]:
+            signature[slot] = value
+    return [
+        (band, (signature[band * ROWS] << 28) | signature[band * ROWS + 1])
+        for band in range(BANDS)
+        if signature[band * ROWS] != _EMPTY or signature[band * ROWS + 1] != _EMPTY
+    ]
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class TranslationMemory:
+    def __init__(self, path: Path = DEFAULT_INDEX):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _text_ids(self, norms: set) -> dict:
+        """Identifiants des textes normalisés, en créant (et indexant en bandes) ceux qui sont nouveaux."""
+        known, bands = {}, []
+        for norm in norms:
+            row = self.conn.execute("SELECT id FROM texts WHERE norm = ?", (norm,)).fetchone()
+            if row:
+                known[norm] = row[0]
+                continue
+            text_id = known[norm] = self.conn.execute("INSERT INTO texts (norm) VALUES (?)", (norm,)).lastrowid
+            bands += [(band, key, text_id) for band, key in band_keys(shingles(norm))]
+        self.conn.executemany("INSERT OR IGNORE INTO bands (band, h, text_id) VALUES (?, ?, ?)", sorted(bands))
+        return known
+
+    def replace_source(self, source: str, sha256: str, rows: list):
+        """Remplace les segments [(clé, ja, fr)] d'une source."""
+        ids = self._text_ids({normalize(ja) for _, ja, _ in rows})
+        self.conn.execute("DELETE FROM segments WHERE source = ?", (source,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO segments (source, key, text_id, fr) VALUES (?, ?, ?, ?)",
+            ((source, str(key), ids[normalize(ja)], fr or "") for key, ja, fr in rows),
+        )
+        self.conn.execute("INSERT OR REPLACE INTO sources (source, sha256) VALUES (?, ?)", (source, sha256))
+
+    def update(self, json_dir: Path = CORPUS_DIR, db_path: Path = None) -> tuple:
+        """Réindexe les sources modifiées et retire celles qui ont disparu. Renvoie (réindexées, inchangées)."""
+        known = dict(self.conn.execute("SELECT source, sha256 FROM sources"))
+        seen, changed = set(), 0
+        for path in corpus_files(json_dir):
+            source = f"json:{path.name}"
+            seen.add(source)
+            sha = file_sha256(path)
+            if known.get(source) != sha:
+                self.replace_source(source, sha, load_entries(path))
+                changed += 1
+        if db_path:
+            with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as db:
+                existing = {r[0] for r in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+                for table in DB_TABLES:
+                    if table not in existing:
+                        continue
+                    source = f"db:{table}"
+                    seen.add(source)
+                    rows = db.execute(f'SELECT id, ja, en FROM "{table}" WHERE ja IS NOT NULL ORDER BY id').fetchall()
+                    sha = hashlib.sha256(repr(rows).encode("utf-8")).hexdigest()
+                    if known.get(source) != sha:
+                        self.replace_source(source, sha, rows)
+                        changed += 1
+        gone = [s for s in known if s not in seen and (db_path or s.startswith("json:"))]
+        for source in gone:
+            self.conn.execute("DELETE FROM segments WHERE source = ?", (source,))
+            self.conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+        self.prune(orphans=bool(changed or gone))
+        self.conn.commit()
+        return changed, len(seen) - changed
+
+    def prune(self, orphans: bool = True):
+        """
+        Retire les bandes vides laissées par d'anciens index et, si orphans, les textes qu'aucun
+        segment ne référence plus avec leurs bandes (parcours complet : seulement après des changements).
+        """
+        self.conn.executemany("DELETE FROM bands WHERE band = ? AND h = ?", ((band, _EMPTY_KEY) for band in range(BANDS)))
+        if orphans:
+            self.conn.execute("DELETE FROM bands WHERE text_id NOT IN (SELECT text_id FROM segments)")
+            self.conn.execute("DELETE FROM texts WHERE id NOT IN (SELECT text_id FROM segments)")
+
+    def translations(self, text_id: int) -> Counter:
+        return Counter(fr for (fr,) in self.conn.execute("SELECT fr FROM segments WHERE text_id = ? AND fr != ''", (text_id,)))
+
+    def exact(self, ja: str) -> Counter:
+        """Traductions existantes d'un texte japonais identique (après normalisation), avec leur fréquence."""
+        row = self.conn.execute("SELECT id FROM texts WHERE norm = ?", (normalize(ja),)).fetchone()
+        return self.translations(row[0]) if row else Counter()
+
+    def similar(self, ja: str, k: int = 5, min_score: float = 0.3) -> list:
+        """Les k textes traduits les plus proches : [(score, ja normalisé, traduction la plus fréquente)]."""
+        grams = shingles(normalize(ja))
+        candidates = set()
+        for band, key in band_keys(grams):
+            candidates.update(r[0] for r in self.conn.execute(
+                "SELECT text_id FROM bands WHERE band = ? AND h = ? LIMIT ?", (band, key, MAX_BUCKET)))
+        scored = []
+        ids = ",".join(map(str, candidates))
+        for text_id, norm in self.conn.execute(f"SELECT id, norm FROM texts WHERE id IN ({ids})"):
+            score = jaccard(grams, shingles(norm))
+            if score >= min_score:
+                scored.append((score, text_id, norm))
+        results = []
+        for score, text_id, norm in sorted(scored, reverse=True):
+            translations = self.translations(text_id)
+            if translations:
+                results.append((score, norm, translations.most_common(1)[0][0]))
+                if len(results) == k:
+                    break
+        return results
+
+    def suggest(self, ja: str, min_score: float = 1.0):
+        """Traduction proposée pour ja : exacte si possible, sinon floue au-dessus de min_score."""
+        exact = self.exact(ja)
+        if exact:
+            return exact.most_common(1)[0][0]
+        if min_score < 1.0:
+            best = self.similar(ja, k=1, min_score=min_score)
+            if best:
+                return best[0][2]
+        return None
+
+
+def prefill(tm: TranslationMemory, paths: list, write: bool, min_score: float) -> tuple:
+    """Propose une traduction pour chaque entrée vide ; l'écrit dans le fichier si write. Renvoie (vides, remplies)."""
+    empty = filled = 0
+    for path in paths:
+        proposals = {}
+        for key, ja, fr in iter_entries(path):
+            if fr:
+                continue
+            empty += 1
+            suggestion = tm.suggest(ja, min_score)
+            if suggestion:
+                proposals[key] = suggestion
+        filled += len(proposals)
+        if proposals:
+            print(f"{path.name} : {len(proposals)} entrée(s) pré-remplie(s)")
+            if write:
+                rewrite_translations(path, proposals)
+    return empty, filled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire de traduction (exacte et floue) du corpus.")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help=f"index persistant (défaut : {DEFAULT_INDEX})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_cmd = sub.add_parser("build", help="crée ou met à jour l'index")
+    build_cmd.add_argument("--json-dir", type=Path, default=CORPUS_DIR)
+    build_cmd.add_argument("--db", type=Path, help="clarity_dialogFR.db à indexer en plus de Json/")
+    query_cmd = sub.add_parser("query", help="traductions exactes et textes proches")
+    query_cmd.add_argument("ja")
+    query_cmd.add_argument("-k", type=int, default=5)
+    prefill_cmd = sub.add_parser("prefill", help="pré-remplit les traductions vides")
+    prefill_cmd.add_argument("files", nargs="*", type=Path, help="fichiers à traiter (défaut : tout Json/)")
+    prefill_cmd.add_argument("--write", action="store_true", help="écrit les propositions dans les fichiers")
+    prefill_cmd.add_argument("--min-score", type=float, default=1.0, help="Jaccard minimal pour une proposition floue (1.0 = exacte uniquement)")
+    args = parser.parse_args()
+
+    tm = TranslationMemory(args.index)
+    try:
+        t0 = time.perf_counter()
+        if args.command == "build":
+            changed, unchanged = tm.update(args.json_dir, args.db)
+            print(f"{changed} source(s) réindexée(s), {unchanged} inchangée(s) en {time.perf_counter() - t0:.1f} s.")
+        elif args.command == "query":
+            for fr, n in tm.exact(args.ja).most_common():
+                print(f"exact ×{n}\t{fr}")
+            for score, norm, fr in tm.similar(args.ja, args.k):
+                print(f"{score:.2f}\t{norm}\n\t-> {fr}")
+            print(f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+        else:
+            empty, filled = prefill(tm, args.files or corpus_files(), args.write, args.min_score)
+            action = "écrites" if args.write else "proposées (--write pour écrire)"
+            print(f"{filled}/{empty} traductions vides {action}.")
+    finally:
+        tm.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
-from io import BytesIO
+from pathlib import Path
 from urllib.request import Request, urlopen
-from zipfile import ZipFile as zip
 
-import glob
 import os
 import shutil
 import subprocess
 import sys
 
+# manifest, staging, journal and rollback are shared with main.py.
+from clarity_install import CHUNK_SIZE, UPDATE_BACKUP as BACKUP, UPDATE_STAGING as STAGING
+from clarity_install import annuler_maj as rollback, installer_release as install_release
+
 CLARITY_URL = "https://github.com/dqx-translation-project/dqxclarity/releases/latest/download/dqxclarity.zip"
 
 
@@ -30,78 +32,73 @@ def kill_clarity_exe():
     os.system("taskkill /f /im DQXClarity.exe >nul 2>&1")
 
 
-def download_latest_zip():
+def download_latest_zip(dest: Path):
+    """Stream the latest release to dest instead of holding it in memory."""
     req = Request(CLARITY_URL)
-    data = urlopen(req, timeout=15)
-    if data.status == 200:
-        zfile = zip(BytesIO(data.read()))
-    else:
-        zfile = None
-    return zfile
-
-
-def delete_file(file: str):
-    try:
-        os.remove(file)
-    except:
-        shutil.rmtree(file, ignore_errors=True)
+    with urlopen(req, timeout=15) as data:
+        if data.status != 200:
+            raise RuntimeError(f"HTTP {data.status}")
+        with open(dest, "wb") as f:
+            shutil.copyfileobj(data, f, CHUNK_SIZE)
 
 
 if is_dqx_process_running():
     input("Please close DQX before updating. Re-launch dqxclarity once the game has been closed.\n\nPress ENTER to close this window.")
     sys.exit()
 
+clarity_path = Path(__file__).parent.resolve()
+if rollback(clarity_path):
+    print("The previous update was interrupted. The previous install has been restored.")
+
 print("dqxclarity is updating. Please wait...")
 kill_clarity_exe()
 
+staging = clarity_path / STAGING
+shutil.rmtree(staging, ignore_errors=True)
+staging.mkdir(parents=True)
+zip_path = staging / "dqxclarity.zip"
+
 try:
-    z_data = download_latest_zip()
-    if not z_data:
-        raise
+    download_latest_zip(zip_path)
 except Exception as e:
+    shutil.rmtree(staging, ignore_errors=True)
     input(f"Failed to download the latest update. Please try again or download the update manually from Github.\n\nError: {e}")
     sys.exit()
 
-# we don't want to delete certain files/folders when updating. these
+# we don't want to touch certain files/folders when updating. these
 # could be old logs, existing user settings or other misc files.
 ignored_files = [
     "user_settings.ini",
     "dqxclarityFR.exe",
+    # files shipped with the FR main.py; they are not part of the release.
+    "clarity_install.py",
+    "json_stream.py",
+    "startup_profile.py",
+    "db_overrides.json",
 ]
 
 ignored_directories = [
     "misc_files",
     "logs",
+    "venv",
+    STAGING,
+    BACKUP,
 ]
 
-clarity_path = os.path.split(__file__)[0]
-clarity_files = glob.glob(f"{clarity_path}/**", recursive=True)
-
-# delete all files except for ones specified in the ignored lists above.
-for file in clarity_files:
-    basename = os.path.basename(file)
-
-    if any(x in file for x in ignored_directories):
-        continue
-    if basename in ignored_files:
-        continue
-    if basename:
-        delete_file(file)
-
-# unzip new files. don't overwrite any files/folders in the ignored lists above.
-for obj in z_data.infolist():
-    basename = os.path.basename(obj.filename)
-
-    if any(x in obj.filename for x in ignored_directories):
-        continue
-    if basename in ignored_files:
-        continue
+try:
+    # only files that differ from the install are replaced; originals are backed up
+    # and journaled first, so a failure (or a crash) can be rolled back.
+    changed, removed, unchanged = install_release(clarity_path, zip_path, ignored_files, ignored_directories, print)
+except Exception as e:
+    input(f"Failed to apply the update. Your previous install has been restored.\n\nError: {e}")
+    sys.exit()
+finally:
+    shutil.rmtree(staging, ignore_errors=True)
 
-    obj.filename = obj.filename.replace("dqxclarity/", "")
-    if obj.filename:
-        z_data.extract(obj, ".")
+print(f"{len(changed)} file(s) updated, {len(removed)} removed, {unchanged} unchanged.")
 
-# remove venv so we can re-install any new modules if we introduce or bump new ones.
-delete_file("venv")
+# remove venv so we can re-install any new modules, but only if we introduced or bumped some.
+if "requirements.txt" in changed:
+    shutil.rmtree(clarity_path / "venv", ignore_errors=True)
 
 input("Success. Please re-launch dqxclarity. Press ENTER to close this window.")
@@ -0,0 +1,229 @@
+"""
+Valide le corpus Json/ avant la construction du DAT et produit un rapport de couverture.
+
+    python validate_json.py [--details] [--json rapport.json] [--full] [fichiers...]
+
+Vérifie chaque entrée {id: {ja: fr}} :
+- forme : une seule clé japonaise, traduction chaîne, id numérique, pas d'id en double (erreur) ;
+- balises de contrôle (<select…>, <yesno…>, <case…>, <end>, <close>) : même nombre dans ja et fr (erreur) ;
+- conditions <if_…>/<else>/<endif> : bien imbriquées dans fr (erreur), mêmes que dans ja (avertissement,
+  une traduction peut se passer d'une variante masculin/féminin) ;
+- balises de mise en page et variables (<br>, <break>, <pc>, <%sL_…>, …) identiques (avertissement) ;
+- fichiers eventTextCs* : au plus MAX_LINES lignes par page et MAX_WIDTH caractères par ligne (avertissement).
+
+Les fichiers sont analysés en parallèle (un processus par cœur). Les résultats sont mis en cache
+dans build/validate_cache.json : seuls les fichiers dont la date, la taille puis l'empreinte ont
+changé sont revérifiés (--full pour tout revérifier). Code de sortie 1 s'il reste des erreurs.
+"""
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+
+from corpus import CORPUS_DIR, corpus_files
+
+CACHE_FILE = Path(__file__).parent / "build" / "validate_cache.json"
+CACHE_VERSION = 1
+MAX_WIDTH = 46
+MAX_LINES = 3
+
+TAG_RE = re.compile(r"<[^<>\n]*>")
+CONTROL_RE = re.compile(r"<(select\b[^>]*|yesno\s*\d*|case\b[^>]*|end|close)>")
+CONDITION_RE = re.compile(r"<(if_\w+|else|endif)>")
+LAYOUT_RE = re.compile(r"<(br|break|pc|%[^<>]+)>")
+PAGE_SPLIT_RE = re.compile(r"<br>|<break>|<end>|<close>")
+DIALOG_PREFIX = "eventTextCs"
+
+
+def prefix_of(name: str) -> str:
+    """Famille d'un fichier : eventTextCsAq10011Client -> eventTextCsAq, 3f1a2f1a -> (hash)."""
+    match = re.match(r"[A-Za-z_]+?(?=\d|Client|\.|$)", name)
+    return match.group(0) if match else "(hash)"
+
+
+def _duplicate_keys(pairs):
+    keys = [k for k, _ in pairs]
+    dict_ = dict(pairs)
+    if len(dict_) != len(keys):
+        dict_["__duplicates__"] = [k for k, n in Counter(keys).items() if n > 1]
+    return dict_
+
+
+def _check_conditions(fr: str):
+    """Message d'erreur si les <if_…>/<else>/<endif> de fr sont mal imbriqués, sinon None."""
+    depth = []
+    for tag in CONDITION_RE.findall(fr):
+        if tag.startswith("if_"):
+            depth.append(False)
+        elif not depth:
+            return f"<{tag}> sans <if_…> ouvrant"
+        elif tag == "else":
+            if depth[-1]:
+                return "deux <else> pour le même <if_…>"
+            depth[-1] = True
+        else:
+            depth.pop()
+    return "<if_…> non fermé" if depth else None
+
+
+def check_entry(key, ja, fr, dialog: bool) -> list:
+    """Problèmes d'une entrée traduite : [(gravité, code, message)]."""
+    issues = []
+    checks = (("control", CONTROL_RE, "error"), ("if", CONDITION_RE, "warning"), ("layout", LAYOUT_RE, "warning"))
+    for name, regex, severity in checks:
+        expected, actual = Counter(regex.findall(ja)), Counter(regex.findall(fr))
+        if expected != actual:
+            missing = "".join(f"<{t}>" for t in (expected - actual).elements())
+            extra = "".join(f"<{t}>" for t in (actual - expected).elements())
+            issues.append((severity, f"tags-{name}", f"manquantes : {missing or '-'} ; en trop : {extra or '-'}"))
+    problem = _check_conditions(fr)
+    if problem:
+        issues.append(("error", "if-nesting", problem))
+    if dialog:
+        for page in PAGE_SPLIT_RE.split(fr):
+            lines = page.strip("\n").split("\n")
+            if len(lines) > MAX_LINES:
+                issues.append(("warning", "lines", f"{len(lines)} lignes sur une page (max {MAX_LINES})"))
+            for line in lines:
+                width = len(TAG_RE.sub("", line))
+                if width > MAX_WIDTH:
+                    issues.append(("warning", "width", f"{width} caractères : {line[:60]!r}"))
+    return issues
+
+
+def check_file(path: str) -> dict:
+    """Analyse un fichier du corpus (exécuté dans un processus du pool)."""
+    path = Path(path)
+    raw = path.read_bytes()
+    result = {"sha256": hashlib.sha256(raw).hexdigest(), "total": 0, "translated": 0, "issues": []}
+    issues = result["issues"]
+    try:
+        data = json.loads(raw.decode("utf-8-sig"), object_pairs_hook=_duplicate_keys)
+    except ValueError as e:
+        issues.append(("error", "json", None, str(e)))
+        return result
+    if not isinstance(data, dict):
+        issues.append(("error", "shape", None, "objet JSON attendu à la racine"))
+        return result
+    for key in data.pop("__duplicates__", []):
+        issues.append(("error", "duplicate-id", key, "id présent plusieurs fois"))
+    dialog = path.name.startswith(DIALOG_PREFIX)
+    for key, value in data.items():
+        if not key.isdigit():
+            issues.append(("error", "shape", key, "id non numérique"))
+        if not isinstance(value, dict) or len(value) != 1 or "__duplicates__" in value:
+            issues.append(("error", "shape", key, "entrée qui n'est pas de la forme {ja: fr}"))
+            continue
+        ((ja, fr),) = value.items()
+        result["total"] += 1
+        if not isinstance(fr, str):
+            issues.append(("error", "shape", key, f"traduction de type {type(fr).__name__}"))
+            continue
+        if not fr:
+            continue
+        result["translated"] += 1
+        issues.extend((severity, code, key, message) for severity, code, message in check_entry(key, ja, fr, dialog))
+    return result
+
+
+def _load_cache() -> dict:
+    try:
+        cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return cache.get("files", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def _save_cache(files: dict):
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_name(CACHE_FILE.name + ".part")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(CACHE_FILE)
+
+
+def validate(paths: list, full: bool = False) -> tuple:
+    """Résultats {nom: résultat} pour paths et nombre de fichiers réellement revérifiés."""
+    cache = {} if full else _load_cache()
+    results, todo = {}, []
+    for path in paths:
+        stat = path.stat()
+        cached = cache.get(path.name)
+        if cached and (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+            results[path.name] = cached
+            continue
+        if cached and cached["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest():
+            results[path.name] = dict(cached, mtime_ns=stat.st_mtime_ns)
+            continue
+        todo.append(path)
+    if todo:
+        with ProcessPoolExecutor() as pool:
+            for path, result in zip(todo, pool.map(check_file, map(str, todo), chunksize=16)):
+                stat = path.stat()
+                results[path.name] = dict(result, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    cache.update(results)
+    _save_cache(cache)
+    return results, len(todo)
+
+
+def report(results: dict, details: bool = False) -> int:
+    """Affiche le rapport ; renvoie le nombre d'erreurs."""
+    counts = Counter()
+    coverage = defaultdict(lambda: [0, 0])
+    failing = []
+    for name in sorted(results):
+        result = results[name]
+        coverage[prefix_of(name)][0] += result["translated"]
+        coverage[prefix_of(name)][1] += result["total"]
+        errors = 0
+        for severity, code, key, message in result["issues"]:
+            counts[severity, code] += 1
+            errors += severity == "error"
+            if details:
+                print(f"{severity.upper():7} {name}:{key or '-'} [{code}] {message}")
+        if errors:
+            failing.append((name, errors))
+
+    total = sum(t for _, t in coverage.values())
+    translated = sum(t for t, _ in coverage.values())
+    print(f"\nCouverture par famille ({len(results)} fichiers) :")
+    for prefix, (done, count) in sorted(coverage.items()):
+        print(f"  {prefix:32} {done:7}/{count:<7} {done / count:6.1%}" if count else f"  {prefix:32} vide")
+    print(f"  {'TOTAL':32} {translated:7}/{total:<7} {translated / max(total, 1):6.1%}")
+
+    print("\nProblèmes :")
+    for (severity, code), n in sorted(counts.items()):
+        print(f"  {severity:8} {code:14} {n}")
+    if failing:
+        print("\nFichiers en erreur :")
+        for name, n in failing:
+            print(f"  {name} ({n})")
+    return sum(n for (severity, _), n in counts.items() if severity == "error")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valide le corpus Json/ et affiche la couverture de traduction.")
+    parser.add_argument("files", nargs="*", type=Path, help="fichiers à vérifier (défaut : tout Json/)")
+    parser.add_argument("--json-dir", type=Path, default=CORPUS_DIR)
+    parser.add_argument("--full", action="store_true", help="ignore le cache et revérifie tout")
+    parser.add_argument("--details", action="store_true", help="affiche chaque problème")
+    parser.add_argument("--json", type=Path, help="écrit le rapport complet (par fichier) dans ce fichier")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    paths = args.files or corpus_files(args.json_dir)
+    results, checked = validate(paths, args.full)
+    errors = report(results, args.details)
+    if args.json:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n{len(results)} fichiers ({checked} revérifiés) en {time.perf_counter() - t0:.1f} s.")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()